@@ -0,0 +1,79 @@
+"""Cart cost per turn: list of lines re-priced on every read vs. Cart with a running total.
+
+Simulates a shopping session that adds items (often the same product and size
+again) and asks "what's in my cart?" after every add, then checks out. The list
+version appends a line per add and looks up and re-sums every line on each
+read and again at checkout (what agent.py used to do); Cart merges lines and
+keeps the total as it goes.
+
+    python bench/bench_cart.py --adds 10 50 200
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from cart import Cart
+from catalog_index import CatalogIndex
+from models import OrderLine
+from synthetic import make_products
+
+
+def list_session(index, adds):
+    cart = []
+    for product_id, quantity, size in adds:
+        cart.append((product_id, quantity, size))
+        total = 0
+        for pid, q, _ in cart:  # show_cart
+            total += index.get(pid).price * q
+    lines = []
+    for pid, q, sz in cart:  # checkout
+        p = index.get(pid)
+        lines.append(OrderLine(pid, p.name, p.price, q, sz))
+    return len(cart), sum(line.line_total for line in lines)
+
+
+def cart_session(index, adds):
+    cart = Cart()
+    for product_id, quantity, size in adds:
+        cart.add(index.get(product_id), quantity, size, catalog_version=index.version)
+        spoken = [line.line_total for line in cart]  # show_cart
+        spoken.append(cart.total)
+    cart.reprice(index)
+    cart.to_order_lines()
+    return len(cart), cart.total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--adds", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    index = CatalogIndex(make_products(args.products))
+    rng = random.Random(5)
+    # a session keeps coming back to a handful of products
+    favourites = [p.id for p in rng.sample(index.products, 8)]
+    print(f"{'adds':>6}{'lines (list/cart)':>20}{'list ms':>10}{'cart ms':>10}")
+    for n in args.adds:
+        adds = [(rng.choice(favourites), rng.randint(1, 2), rng.choice(["M", "L"])) for _ in range(n)]
+        assert list_session(index, adds)[1] == cart_session(index, adds)[1]
+        timings = {}
+        for name, session in (("list", list_session), ("cart", cart_session)):
+            runs = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                lines, _ = session(index, adds)
+                runs.append((time.perf_counter() - t0) * 1000)
+            timings[name] = (lines, statistics.median(runs))
+        print(f"{n:>6}{timings['list'][0]:>10}/{timings['cart'][0]:<9}{timings['list'][1]:>10.3f}{timings['cart'][1]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
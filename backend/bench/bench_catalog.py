@@ -0,0 +1,81 @@
+"""/acp/catalog cost per request: serialize + compress on every request vs. prebuilt payloads.
+
+For each catalog size and a few typical queries (whole catalog, the grid's
+id/name/price/image_url projection, one category, one 24-product page), times
+building the response the straightforward way - filter, to_dict, json.dumps,
+gzip as a compression middleware would - against looking up the prebuilt
+payload. Also prints body sizes per encoding (brotli only if installed).
+
+    python bench/bench_catalog.py --sizes 100 1000 10000
+"""
+import argparse
+import functools
+import gzip
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import catalog
+from catalog_index import CatalogIndex
+from catalog_payloads import FIELDS, GRID_FIELDS, CatalogPayloads
+from synthetic import make_products
+
+QUERIES = {
+    "all": ({}, FIELDS, 0, None),
+    "grid": ({}, GRID_FIELDS, 0, None),
+    "category": ({"category": "hoodie"}, FIELDS, 0, None),
+    "page of 24": ({}, GRID_FIELDS, 48, 24),
+}
+ACCEPT = "gzip, deflate, br"
+
+
+def dynamic(index, filters, fields, offset, limit):
+    products = catalog.list_products(filters, index=index)
+    end = len(products) if limit is None else offset + limit
+    page = [{f: r[f] for f in fields if f in r} for r in (p.to_dict() for p in products[offset:end])]
+    return gzip.compress(json.dumps({"products": page, "total": len(products)}).encode(), 6)
+
+
+def serve(payloads, index, filters, fields, offset, limit):
+    p = payloads.get(filters, fields, offset, limit, index=index)
+    return p.variant(p.encoding_for(ACCEPT))
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'products':>9} {'query':<11}{'dynamic ms':>11}{'prebuilt ms':>12}{'build ms':>10}"
+          f"{'json B':>10}{'gzip B':>9}{'br B':>9}")
+    for size in args.sizes:
+        index = CatalogIndex(make_products(size), digest="bench")
+        payloads = CatalogPayloads()
+        for name, (filters, fields, offset, limit) in QUERIES.items():
+            t0 = time.perf_counter()
+            payload = payloads.get(filters, fields, offset, limit, index=index)
+            build = (time.perf_counter() - t0) * 1000
+            naive = timed(functools.partial(dynamic, index, filters, fields, offset, limit), args.repeat)
+            prebuilt = timed(functools.partial(serve, payloads, index, filters, fields, offset, limit), args.repeat)
+            sizes = {k: len(v) for k, v in payload.bodies.items()}
+            print(f"{size:>9} {name:<11}{naive:>11.2f}{prebuilt:>12.4f}{build:>10.1f}"
+                  f"{sizes['identity']:>10}{sizes['gzip']:>9}{sizes.get('br', '-'):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Load test for the order feed: hundreds of dashboards on /acp/orders/events.
+
+Starts the API (uvicorn, separate process) on a scratch journal, connects
+--clients server-sent-event clients, then places --orders orders through the
+journal the way the agent does (another process appending), at --rate orders
+per second. Reports how many clients received every order, commit-to-delivery
+latency and the API process's CPU time.
+
+    python bench/bench_feed.py --clients 500 --orders 50 --rate 10
+
+Needs the API requirements installed (pip install -r requirements-api.txt).
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from order_store import OrderJournal
+from synthetic import make_catalog, make_orders
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def _wait_ready(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("API did not start")
+
+
+async def _client(port: int, committed: dict, latencies: list, received: list, ready: asyncio.Event, counter: list):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /acp/orders/events HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    got = 0
+    event = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            line = line.strip()
+            if line.startswith(b"event: "):
+                event = line[7:]
+                if event == b"stats" and not got and not ready.is_set():
+                    counter[0] += 1
+                    if counter[0] == counter[1]:
+                        ready.set()
+            elif line.startswith(b"data: ") and event == b"order":
+                now = time.time()
+                oid = json.loads(line[6:])["id"]
+                if oid in committed:
+                    latencies.append((now - committed[oid]) * 1000)
+                    got += 1
+    except asyncio.CancelledError:
+        pass
+    finally:
+        received.append(got)
+        writer.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=10.0, help="orders per second")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench-feed-")
+    journal_path = os.path.join(tmp, "orders.jsonl")
+    port = _free_port()
+    env = dict(os.environ, ORDERS_JOURNAL=journal_path)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SRC, env=env,
+    )
+    try:
+        await _wait_ready(port)
+        committed, latencies, received = {}, [], []
+        ready = asyncio.Event()
+        counter = [0, args.clients]
+        clients = [
+            asyncio.create_task(_client(port, committed, latencies, received, ready, counter))
+            for _ in range(args.clients)
+        ]
+        await asyncio.wait_for(ready.wait(), 60)
+        print(f"{args.clients} clients subscribed")
+
+        journal = OrderJournal(journal_path)
+        cpu0 = _cpu_seconds(server.pid)
+        for order in make_orders(args.orders, make_catalog(100), seed=int(time.time())):
+            committed[order["id"]] = time.time()
+            journal.append_batch([order])  # durable, like the agent's writer
+            await asyncio.sleep(1 / args.rate)
+        await asyncio.sleep(1.0)  # let the last deliveries land
+        cpu = _cpu_seconds(server.pid) - cpu0
+        for task in clients:
+            task.cancel()
+        await asyncio.gather(*clients)
+        journal.close()
+
+        expected = args.orders * args.clients
+        complete = sum(1 for n in received if n == args.orders)
+        latencies.sort()
+        print(f"delivered {len(latencies)}/{expected} order events; {complete}/{args.clients} clients got every order")
+        if latencies:
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"commit->client latency ms: p50 {statistics.median(latencies):.1f}  p99 {p99:.1f}  max {latencies[-1]:.1f}")
+        print(f"API CPU: {cpu:.2f}s for {args.orders} orders ({cpu / args.orders * 1000:.1f} ms per order fanned out)")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
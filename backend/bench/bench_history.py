@@ -0,0 +1,79 @@
+"""Session history memory over a long session: list of dicts vs. bounded ring + trace file.
+
+Records N cart actions per session the way agent.py used to (a dict with an
+ISO timestamp string each, kept for the whole session) and with
+SessionHistory, and reports the memory still held per session (tracemalloc)
+and the time per recorded action. SessionHistory spills to a temporary trace
+directory, which is read back to check that nothing was lost.
+
+    python bench/bench_history.py --actions 1000 10000 100000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from session_trace import Action, SessionHistory, read_trace
+from synthetic import make_catalog
+
+
+def dict_history(actions):
+    history = []
+    for action, subject, quantity in actions:
+        history.append({
+            "time": datetime.utcnow().isoformat() + "Z",
+            "action": action.name.lower(),
+            "product_id": subject,
+            "quantity": quantity,
+        })
+    return history
+
+
+def ring_history(actions, parent):
+    history = SessionHistory("bench", directory=Path(tempfile.mkdtemp(dir=parent)))
+    for action, subject, quantity in actions:
+        history.record(action, subject, quantity)
+    return history
+
+
+def measure(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    seconds = time.perf_counter() - t0  # timed without tracemalloc, which slows allocation
+    tracemalloc.start()
+    kept = fn(*args)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return kept, held, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    ids = [p["id"] for p in make_catalog(1000)]
+    rng = random.Random(3)
+    print(f"{'actions':>9}{'dicts KiB':>11}{'ring KiB':>10}{'dicts us/op':>13}{'ring us/op':>12}")
+    for n in args.actions:
+        actions = [(Action.ADD_TO_CART, rng.choice(ids), rng.randint(1, 3)) for _ in range(n)]
+        _, dict_bytes, dict_s = measure(dict_history, actions)
+        with tempfile.TemporaryDirectory() as tmp:
+            history, ring_bytes, ring_s = measure(ring_history, actions, Path(tmp))
+            asyncio.run(history.close())
+            _, events = read_trace(history.path)
+            assert len(events) == n, (len(events), n)
+        print(f"{n:>9}{dict_bytes / 1024:>11.0f}{ring_bytes / 1024:>10.0f}"
+              f"{dict_s / n * 1e6:>13.2f}{ring_s / n * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
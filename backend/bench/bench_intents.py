@@ -0,0 +1,83 @@
+"""Intent fast path: routing cost and accuracy on a labelled set of utterances.
+
+Runs intents.match over transcripts as Deepgram returns them (punctuated,
+capitalized, with politeness around the command), some of which should be
+answered without the LLM and some of which must not be: commands with more in
+them, negations, checkout. Prints the per-utterance routing time, how many
+fast-path commands were caught, and every misroute. Exits non-zero if
+anything was routed to the wrong intent or taken away from the LLM.
+
+    python bench/bench_intents.py
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from intents import Intent, match
+
+LABELLED = [
+    ("Show my cart.", Intent.SHOW_CART),
+    ("What's in my cart?", Intent.SHOW_CART),
+    ("Hey Aria, what's in the cart right now?", Intent.SHOW_CART),
+    ("Can you read me my cart, please?", Intent.SHOW_CART),
+    ("I'd like to see my basket.", Intent.SHOW_CART),
+    ("Cart.", Intent.SHOW_CART),
+    ("Clear my cart.", Intent.CLEAR_CART),
+    ("Please empty the cart.", Intent.CLEAR_CART),
+    ("Remove everything from my cart.", Intent.CLEAR_CART),
+    ("What was my last order?", Intent.LAST_ORDER),
+    ("My last order, please.", Intent.LAST_ORDER),
+    ("What did I order last time?", Intent.LAST_ORDER),
+    ("Show me my order history.", Intent.ORDER_HISTORY),
+    ("Could you show me my past orders?", Intent.ORDER_HISTORY),
+    ("How much have I spent so far?", Intent.SPENDING_SUMMARY),
+    ("Tell me my spending summary.", Intent.SPENDING_SUMMARY),
+    # these need the LLM
+    ("Clear the cart and add a black hoodie.", None),
+    ("Don't clear my cart.", None),
+    ("Show my cart total in dollars.", None),
+    ("Place my order.", None),
+    ("Show me the catalog.", None),
+    ("Add the second one to my cart.", None),
+    ("Remove the first item from my cart.", None),
+    ("What was the price of my last order's hoodie?", None),
+    ("Is my last order shipped yet?", None),
+    ("I want a mug.", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    misroutes = []
+    for text, expected in LABELLED:
+        got = match(text)
+        if got != expected:
+            misroutes.append((text, expected, got))
+
+    samples = []
+    for _ in range(args.repeat):
+        for text, _ in LABELLED:
+            t0 = time.perf_counter()
+            match(text)
+            samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+
+    commands = [text for text, expected in LABELLED if expected is not None]
+    caught = sum(1 for text in commands if match(text) is not None)
+    print(f"routing:    p50 {statistics.median(samples):.1f} us  p99 {samples[int(len(samples) * 0.99)]:.1f} us per utterance")
+    print(f"fast path:  {caught}/{len(commands)} commands answered without the LLM")
+    print(f"misroutes:  {len(misroutes)}")
+    for text, expected, got in misroutes:
+        print(f"  {text!r}: expected {expected and expected.value}, got {got and got.value}")
+    sys.exit(1 if misroutes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Event-loop lag while sessions place orders and read their last order.
+
+Simulates --sessions concurrent sessions on one event loop (one job process),
+each doing --rounds of "place an order, then ask for the last order" against a
+journal pre-filled with --history orders. A ticker coroutine measures how late
+each 5 ms timer fires; that lateness is how long audio frames for every session
+in the process were held up.
+
+  blocking:  journal append + fsync and a full read_all() on the event loop
+             (the tools before AsyncOrderWriter)
+  async:     AsyncOrderWriter - queued, coalesced writes and reads in threads
+
+    python bench/bench_loop_lag.py --history 100000 --sessions 20 --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from order_store import AsyncOrderWriter, OrderJournal
+from synthetic import make_catalog, make_orders
+
+TICK = 0.005
+
+
+async def _ticker(lags, stop: asyncio.Event):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append((time.perf_counter() - t0 - TICK) * 1000)
+
+
+async def _session(orders, place, read_last, rounds: int, rng: random.Random):
+    for _ in range(rounds):
+        await asyncio.sleep(rng.uniform(0, 0.05))  # customer talking
+        await place(orders.pop())
+        await read_last()
+
+
+async def _run(name: str, journal: OrderJournal, args, orders) -> None:
+    if name == "blocking":
+        async def place(order):
+            journal.append(order)
+            journal.sync()
+
+        async def read_last():
+            return journal.read_all()[-1]
+    else:
+        writer = AsyncOrderWriter(journal)
+
+        async def place(order):
+            await writer.append(order)
+
+        async def read_last():
+            return (await writer.read_all())[-1]
+
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    rng = random.Random(3)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_session(orders, place, read_last, args.rounds, rng) for _ in range(args.sessions)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await ticker
+    if name != "blocking":
+        await writer.aclose()
+
+    lags.sort()
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    extra = f"  {writer.stats()}" if name != "blocking" else ""
+    print(f"{name:<10}{statistics.median(lags):>9.2f}{p99:>9.2f}{lags[-1]:>9.1f}{elapsed:>9.2f}{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", type=int, default=100_000, help="orders already in the journal")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    catalog = make_catalog(1000)
+    new_orders = make_orders(2 * args.sessions * args.rounds, catalog, seed=5)
+    print(f"{args.history} orders in history, {args.sessions} sessions x {args.rounds} rounds")
+    print(f"{'mode':<10}{'lag p50':>9}{'lag p99':>9}{'max ms':>9}{'wall s':>9}")
+    for name in ("blocking", "async"):
+        with tempfile.TemporaryDirectory(prefix="bench-lag-") as tmp:
+            journal = OrderJournal(os.path.join(tmp, "orders.jsonl"))
+            journal.append_batch(make_orders(args.history, catalog))
+            orders = new_orders[: args.sessions * args.rounds] if name == "blocking" else new_orders[args.sessions * args.rounds:]
+            asyncio.run(_run(name, journal, args, list(orders)))
+            journal.close()
+
+
+if __name__ == "__main__":
+    main()
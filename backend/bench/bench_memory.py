@@ -0,0 +1,86 @@
+"""Resident size of the catalog and order history: plain dicts vs models records.
+
+Writes a synthetic catalog and order journal as JSONL (the on-disk formats),
+then loads each file twice under tracemalloc: once keeping the parsed dicts,
+as the code did before models.py, and once keeping Product / Order records.
+Only the retained objects are counted.
+
+    python bench/bench_memory.py --products 100000 --orders 1000000
+
+One million orders held as dicts needs a few GB of RAM; pass a smaller
+--orders on small machines (the per-order numbers barely change).
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from models import Order, Product
+from synthetic import make_catalog, make_orders
+
+CHUNK = 100_000
+
+
+def _write_catalog(path: str, n: int) -> None:
+    with open(path, "w") as f:
+        for p in make_catalog(n):
+            f.write(json.dumps(Product.from_dict(p).to_dict()) + "\n")
+
+
+def _write_orders(path: str, n: int) -> None:
+    catalog = make_catalog(1000)
+    with open(path, "w") as f:
+        for start in range(0, n, CHUNK):
+            for o in make_orders(min(CHUNK, n - start), catalog, seed=11 + start):
+                f.write(json.dumps(Order.from_dict(o).to_dict()) + "\n")
+
+
+def _measure(path: str, convert) -> tuple:
+    """(MB retained, seconds) for loading every line of ``path`` through ``convert``."""
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    with open(path) as f:
+        kept = [convert(json.loads(line)) for line in f]
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size / 2**20, elapsed
+
+
+def _report(label: str, count: int, path: str, record_cls) -> None:
+    as_dicts, dict_s = _measure(path, lambda d: d)
+    as_records, rec_s = _measure(path, record_cls.from_dict)
+    print(f"{label} ({count})")
+    print(f"  {'dicts':<10}{as_dicts:>9.1f} MB{as_dicts * 2**20 / count:>9.0f} B each{dict_s:>8.2f}s load")
+    print(f"  {'records':<10}{as_records:>9.1f} MB{as_records * 2**20 / count:>9.0f} B each{rec_s:>8.2f}s load")
+    print(f"  saving    {1 - as_records / as_dicts:>9.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-memory-") as tmp:
+        catalog_path = os.path.join(tmp, "catalog.jsonl")
+        orders_path = os.path.join(tmp, "orders.jsonl")
+        _write_catalog(catalog_path, args.products)
+        _write_orders(orders_path, args.orders)
+        _report("products", args.products, catalog_path, Product)
+        _report("orders", args.orders, orders_path, Order)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Order history lookups: full journal parse vs. the byte-offset OrderIndex.
+
+Fills a journal with --orders synthetic orders, then times "last order",
+"order by id" and "a customer's last 3 orders" both ways, plus opening the
+index cold (no .idx file: one full scan) and warm (entries read from .idx).
+
+    python bench/bench_order_index.py --orders 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from order_store import OrderIndex, OrderJournal, customer_key
+from synthetic import make_catalog, make_orders
+
+CHUNK = 100_000
+
+
+def _ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-index-") as tmp:
+        journal = OrderJournal(os.path.join(tmp, "orders.jsonl"))
+        catalog = make_catalog(1000)
+        for start in range(0, args.orders, CHUNK):
+            journal.append_batch(make_orders(min(CHUNK, args.orders - start), catalog, seed=11 + start))
+        middle = make_orders(1, catalog, seed=11)[0]
+        customer = customer_key(middle)
+
+        t0 = time.perf_counter()
+        index = OrderIndex(journal)
+        len(index)
+        cold = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        len(OrderIndex(journal))
+        warm = time.perf_counter() - t0
+        print(f"{args.orders} orders; index open: cold {cold:.2f}s, warm {warm:.2f}s")
+
+        scan_repeat = max(1, args.repeat // 10)
+        print(f"{'lookup':<24}{'full parse ms':>14}{'index ms':>12}")
+        cases = [
+            ("last order", lambda: journal.read_all()[-1], lambda: index.last()),
+            ("order by id", lambda: next(o for o in journal.read_all() if o["id"] == middle["id"]),
+             lambda: index.get(middle["id"])),
+            ("customer's last 3", lambda: [o for o in journal.read_all() if customer_key(o) == customer][-3:],
+             lambda: index.last(3, customer)),
+        ]
+        for name, full, indexed in cases:
+            print(f"{name:<24}{_ms(full, scan_repeat):>14.1f}{_ms(indexed, args.repeat):>12.3f}")
+        journal.close()
+
+
+if __name__ == "__main__":
+    main()
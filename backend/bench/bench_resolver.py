@@ -0,0 +1,89 @@
+"""Latency of spoken product-reference resolution on synthetic catalogs.
+
+Compares ProductResolver (resolver.py) with the linear-scan heuristic that
+agent.find_product_by_ref used before it.
+
+    python bench/bench_resolver.py --sizes 10 1000 50000
+"""
+import argparse
+import functools
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from models import Product
+from resolver import ProductResolver
+from synthetic import make_catalog
+
+REFS = [
+    "second hoodie",
+    "black hoodie",
+    "navy blue zip hoodie",
+    "grey hoody",
+    "tee shirt in maroon",
+    "the travel mug",
+    "third one",
+    "cap-000003",
+]
+
+
+def legacy_find_product_by_ref(ref_text, cand):
+    """The previous agent.find_product_by_ref, kept here as the baseline."""
+    ref = (ref_text or "").lower().strip()
+    ordinals = {"first": 0, "second": 1, "third": 2}
+    for word, idx in ordinals.items():
+        if word in ref and idx < len(cand):
+            return cand[idx]
+    for p in cand:
+        if p["id"].lower() == ref:
+            return p
+    for p in cand:
+        if p.get("color") and p["color"] in ref and p.get("category") and p["category"] in ref:
+            return p
+    for p in cand:
+        if p["name"].lower() in ref or any(w in p["name"].lower() for w in ref.split()):
+            return p
+    for token in ref.split():
+        if token.isdigit():
+            idx = int(token) - 1
+            if 0 <= idx < len(cand):
+                return cand[idx]
+    return None
+
+
+def _median_us(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 50_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        products = make_catalog(size)
+        t0 = time.perf_counter()
+        resolver = ProductResolver([Product.from_dict(p) for p in products])
+        build_ms = (time.perf_counter() - t0) * 1000
+        print(f"\ncatalog {size} products (resolver build {build_ms:.1f} ms)")
+        print(f"{'reference':<24}{'resolver us':>12}{'legacy us':>12}  resolved (confidence)")
+        for ref in REFS:
+            new_us = _median_us(functools.partial(resolver.resolve, ref), args.repeat)
+            old_us = _median_us(functools.partial(legacy_find_product_by_ref, ref, products), max(5, args.repeat // 10))
+            m = resolver.resolve(ref)
+            got = f"{m.product.id} ({m.confidence:.2f})" if m else "-"
+            print(f"{ref:<24}{new_us:>12.1f}{old_us:>12.1f}  {got}")
+
+
+if __name__ == "__main__":
+    main()
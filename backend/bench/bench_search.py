@@ -0,0 +1,78 @@
+"""Full-text search benchmark on a synthetic catalog.
+
+Compares BM25 search (search.py) with the old per-product substring scan, and
+times index build and incremental updates.
+
+    python bench/bench_search.py --products 100000
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from search import SearchIndex
+from synthetic import make_catalog, make_products
+
+QUERIES = [
+    "hoodie",
+    "black cotton hoodie",
+    "navy blue zip hoodie",
+    "travel mug",
+    "graphic t-shirt",
+    "hood",
+    "premium fleece",
+    "maroon beanie",
+]
+
+
+def _substring_scan(products, q):
+    q = q.lower()
+    return [p for p in products if q in p["name"].lower() or q in p["description"].lower()]
+
+
+def _timed(fn, repeat):
+    """(first call ms, median of the following calls ms); the first BM25 call per
+    term also sorts that term's impact list."""
+    samples = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples[0], statistics.median(samples[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-k", type=int, default=8)
+    args = parser.parse_args()
+
+    products = make_catalog(args.products)
+    t0 = time.perf_counter()
+    index = SearchIndex(make_products(args.products))
+    print(f"build: {len(products)} products in {time.perf_counter() - t0:.2f}s")
+
+    print(f"{'query':<24}{'bm25 first ms':>14}{'bm25 p50 ms':>13}{'scan p50 ms':>13}{'hits':>8}")
+    for q in QUERIES:
+        first, p50 = _timed(lambda q=q: index.search(q, k=args.k), args.repeat)
+        _, scan50 = _timed(lambda q=q: _substring_scan(products, q), max(3, args.repeat // 4))
+        hits = len(index.search(q))
+        print(f"{q:<24}{first:>14.2f}{p50:>13.2f}{scan50:>13.2f}{hits:>8}")
+
+    # incremental maintenance: reprice / rename a product in place
+    n = min(1000, len(products))
+    t0 = time.perf_counter()
+    for p in make_products(n):
+        p.name += " v2"
+        index.update(p)
+    per_update = (time.perf_counter() - t0) * 1e6 / n
+    print(f"update: {per_update:.1f} us per product ({n} updates)")
+
+
+if __name__ == "__main__":
+    main()
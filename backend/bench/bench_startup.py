@@ -0,0 +1,96 @@
+"""Job-process cold start: what importing agent.py and prewarm cost in a fresh interpreter.
+
+Each run starts a new Python process (like the worker's process pool does) and
+times:
+
+  import agent   - module import, plugins deferred (what every job process pays)
+  + plugins      - the same with the speech plugins imported up front, i.e. the
+                   previous startup path
+  prewarm        - prewarm(): plugin import, VAD load, catalog index
+
+then prints the slowest modules from ``python -X importtime -c "import agent"``.
+Time to first greeting is logged by every job ("greeting queued N ms after job
+start"); it adds session start and room connection to the numbers here.
+
+    python bench/bench_startup.py --runs 5
+
+Needs the agent requirements installed (livekit-agents and plugins).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+if {eager}:
+    from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+import agent
+t1 = time.perf_counter()
+
+class Proc:
+    userdata = {{}}
+
+agent.prewarm(Proc())
+t2 = time.perf_counter()
+print(json.dumps({{"import": t1 - t0, "prewarm": t2 - t1}}))
+"""
+
+
+def _run(env, eager):
+    t0 = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD.format(eager=eager)],
+        cwd=SRC, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - t0
+    timings = json.loads(out.stdout.strip().splitlines()[-1])
+    timings["wall"] = wall
+    return timings
+
+
+def _importtime(env, top):
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import agent"],
+        cwd=SRC, env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(self_us), int(cumulative_us), name))
+    total = next((cum for _, cum, name in rows if name.strip() == "agent"), 0)
+    print(f"\n-X importtime: import agent {total / 1000:.0f} ms; slowest modules (self time):")
+    for self_us, cumulative_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {self_us / 1000:>8.1f} ms self {cumulative_us / 1000:>8.1f} ms cumulative  {name.strip()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # keep the benchmark's orders out of the real journal
+    env = dict(os.environ, ORDERS_JOURNAL=os.path.join(tempfile.mkdtemp(prefix="bench-startup-"), "orders.jsonl"))
+    print(f"{'startup path':<22}{'import ms':>11}{'prewarm ms':>12}{'process s':>11}")
+    for name, eager in (("plugins at import", True), ("plugins deferred", False)):
+        runs = [_run(env, eager) for _ in range(args.runs)]
+        print(f"{name:<22}{statistics.median(r['import'] for r in runs) * 1000:>11.0f}"
+              f"{statistics.median(r['prewarm'] for r in runs) * 1000:>12.0f}"
+              f"{statistics.median(r['wall'] for r in runs):>11.2f}")
+    _importtime(env, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""/acp/stats cost by order-history size: recompute per poll vs. materialized counters.
+
+For each history size, times one dashboard poll right after a new order
+arrives: recomputing revenue, counts and top products over every order (what a
+naive endpoint would do), vs. OrderStats, where the new order was applied on
+commit and the poll only reads the counters.
+
+    python bench/bench_stats.py --sizes 1000 100000 1000000
+"""
+import argparse
+import heapq
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from models import Order
+from order_stats import OrderStats
+from synthetic import make_catalog, make_orders
+
+
+def recompute(orders):
+    revenue = sum(o.total for o in orders)
+    products = {}
+    for o in orders:
+        for line in o.lines:
+            products[line.product_id] = products.get(line.product_id, 0) + line.line_total
+    return {
+        "total_orders": len(orders),
+        "total_revenue": revenue,
+        "average_order_value": revenue / len(orders),
+        "top_products": heapq.nlargest(5, products.items(), key=lambda kv: kv[1]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    catalog = make_catalog(1000)
+    category = {p["id"]: p["category"] for p in catalog}
+    print(f"{'orders':>10}{'recompute ms':>14}{'materialized ms':>17}")
+    for size in args.sizes:
+        orders = [Order.from_dict(o) for o in make_orders(size + args.repeat, catalog)]
+        history, incoming = orders[:size], orders[size:]
+        stats = OrderStats(category_of=category.get)
+        for o in history:
+            stats.add(o)
+
+        naive, materialized = [], []
+        for o in incoming:
+            history.append(o)
+            t0 = time.perf_counter()
+            recompute(history)
+            naive.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            stats.add(o)  # done on commit
+            stats.snapshot()
+            materialized.append((time.perf_counter() - t0) * 1000)
+        print(f"{size:>10}{statistics.median(naive):>14.2f}{statistics.median(materialized):>17.3f}")
+
+
+if __name__ == "__main__":
+    main()
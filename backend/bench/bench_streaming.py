@@ -0,0 +1,104 @@
+"""Time-to-first-chunk harness for streamed catalog and order listings.
+
+Runs show_catalog and last_order against a synthetic catalog and order history,
+once returning the whole listing as a string (STREAM_LISTINGS off) and once
+streaming it line by line to a stand-in speech pipeline (STREAM_LISTINGS on).
+In blocking mode TTS can only start once the tool has returned and the LLM has
+read the listing back, so --llm-ttft-ms is added to that path.
+
+    python bench/bench_streaming.py --products 50000 --listing 20 --orders 100000
+
+Needs livekit-agents installed (agent.py is imported); no API keys are used.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+os.environ.setdefault("ORDERS_JOURNAL", os.path.join(tempfile.mkdtemp(prefix="bench-stream-"), "orders.jsonl"))
+
+import agent
+import catalog
+from catalog_index import CatalogIndex
+from synthetic import make_catalog, make_orders, make_products
+
+
+class FakeSession:
+    """Consumes what a tool hands to session.say() and records chunk timings."""
+
+    def __init__(self):
+        self.first_chunk_at = None
+        self.playing = None
+
+    def say(self, source, **kwargs):
+        async def consume():
+            async for _ in source:
+                if self.first_chunk_at is None:
+                    self.first_chunk_at = time.perf_counter()
+
+        self.playing = asyncio.get_running_loop().create_task(consume())
+
+
+class FakeContext:
+    def __init__(self):
+        self.userdata = agent.Userdata(customer_id="customer-0")  # has orders in the synthetic journal
+        self.session = FakeSession()
+
+
+async def _measure(name, tool, kwargs, streaming: bool, llm_ttft_ms: float) -> float:
+    """Milliseconds from tool call until the first text could reach TTS."""
+    agent.STREAM_LISTINGS = streaming
+    agent.catalog_render_cache.invalidate()
+    ctx = FakeContext()
+    t0 = time.perf_counter()
+    result = await tool(ctx, **kwargs)
+    if not streaming:
+        return (time.perf_counter() - t0) * 1000 + llm_ttft_ms
+    if ctx.session.playing is None:
+        raise RuntimeError(f"{name} did not stream its listing; it returned {result!r}")
+    await ctx.session.playing
+    if ctx.session.first_chunk_at is None:
+        raise RuntimeError(f"{name} streamed an empty listing")
+    return (ctx.session.first_chunk_at - t0) * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--listing", type=int, default=20, help="items read out by show_catalog")
+    parser.add_argument("--orders", type=int, default=10_000, help="orders already in the journal")
+    parser.add_argument("--llm-ttft-ms", type=float, default=0.0,
+                        help="LLM time-to-first-token added to the blocking path")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    products = make_products(args.products)
+    catalog.swap_index(CatalogIndex(products))
+    agent.CATALOG_LISTING_SIZE = args.listing
+    for order in make_orders(args.orders, make_catalog(1000)):
+        agent.order_journal.append(order)
+    agent.order_journal.sync()
+
+    cases = [
+        ("show_catalog q='hoodie'", agent.show_catalog, {"q": "hoodie"}),
+        ("show_catalog category=mug", agent.show_catalog, {"category": "mug"}),
+        ("last_order", agent.last_order, {}),
+    ]
+    print(f"{args.products} products, listing {args.listing}, {args.orders} orders, "
+          f"llm ttft {args.llm_ttft_ms:.0f} ms")
+    print(f"{'case':<30}{'blocking ms':>13}{'streamed first-chunk ms':>25}")
+    for name, tool, kwargs in cases:
+        blocking = [await _measure(name, tool, kwargs, False, args.llm_ttft_ms) for _ in range(args.repeat)]
+        streamed = [await _measure(name, tool, kwargs, True, args.llm_ttft_ms) for _ in range(args.repeat)]
+        print(f"{name:<30}{statistics.median(blocking):>13.2f}{statistics.median(streamed):>25.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
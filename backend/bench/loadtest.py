@@ -0,0 +1,269 @@
+"""Headless load test: thousands of simulated shopping sessions against the agent's tools.
+
+No LiveKit room, Deepgram, Gemini or Murf: each session is a coroutine with a
+fake RunContext[Userdata] that calls the tools in agent.py directly, the way
+the LLM would, following a scripted shopping journey (browse, pick "the second
+one", check the cart, check out, ask for the last order, ...). STT, LLM and
+TTS are stood in for by sleeps drawn around the given latencies, so sessions
+overlap the way real ones do; --speech-scale 0 drops them and measures the
+tools flat out.
+
+Sessions run --sessions to an event loop, one loop per --procs process, all
+placing orders into one fresh journal. Reports throughput, p50/p99 latency
+per tool and per turn, event-loop lag, and order-store contention: batched
+writes, queue depth and time spent waiting for the journal's lock file.
+Every placed order is checked against the journal at the end.
+
+    python bench/loadtest.py --procs 4 --sessions 500 --journeys 3
+    python bench/loadtest.py --procs 1 --sessions 2000 --speech-scale 0
+
+Needs the agent requirements installed (agent.py imports livekit-agents; the
+speech plugins are not loaded).
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+# Scripted journeys: (weight, [(tool, kwargs), ...]). References like "the second
+# one" resolve against the listing the session was just read, as in a real call.
+JOURNEYS = {
+    "browse_and_buy": (4, [
+        ("show_catalog", {"category": "mug"}),
+        ("add_to_cart", {"product_ref": "the second one"}),
+        ("show_cart", {}),
+        ("place_order", {}),
+    ]),
+    "sized_hoodie": (3, [
+        ("show_catalog", {"q": "hoodie"}),
+        ("add_to_cart", {"product_ref": "the first one", "quantity": 1, "size": "M"}),
+        ("add_to_cart", {"product_ref": "the first one", "quantity": 1, "size": "M"}),
+        ("show_catalog", {"category": "tshirt", "max_price": 1000}),
+        ("add_to_cart", {"product_ref": "last", "size": "L"}),
+        ("update_cart_quantity", {"item": "first", "quantity": 1}),
+        ("show_cart", {}),
+        ("place_order", {}),
+        ("last_order", {}),
+    ]),
+    "window_shopper": (2, [
+        ("show_catalog", {}),
+        ("show_catalog", {"category": "tshirt"}),
+        ("show_catalog", {"q": "black"}),
+        ("add_to_cart", {"product_ref": "the third one"}),
+        ("remove_from_cart", {"item": "the first item"}),
+        ("show_cart", {}),
+    ]),
+    "returning_customer": (1, [
+        ("last_order", {}),
+        ("order_history", {}),
+        ("spending_summary", {}),
+    ]),
+}
+
+TICK = 0.005
+
+
+def _pct(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class FakeSession:
+    """Stands in for AgentSession.say(): drains streamed listings at TTS pace."""
+
+    def __init__(self, speech):
+        self.speech = speech
+        self._playing = set()
+
+    def say(self, text, add_to_chat_ctx=True):
+        if not isinstance(text, str):
+            task = asyncio.ensure_future(self._drain(text))
+            self._playing.add(task)
+            task.add_done_callback(self._playing.discard)
+
+    async def _drain(self, chunks):
+        async for _ in chunks:
+            await self.speech.wait("tts")
+
+
+class FakeRunContext:
+    """What the tools use of RunContext[Userdata]: the session's userdata and session."""
+
+    def __init__(self, userdata, session):
+        self.userdata = userdata
+        self.session = session
+
+
+class Speech:
+    """Sleeps standing in for STT, LLM and TTS latency (lognormal around the means)."""
+
+    SIGMA = 0.35
+
+    def __init__(self, means_ms, scale, rng):
+        self.means = {stage: ms * scale / 1000 for stage, ms in means_ms.items()}
+        self.rng = rng
+
+    async def wait(self, stage):
+        mean = self.means[stage]
+        if mean > 0:
+            await asyncio.sleep(self.rng.lognormvariate(math.log(mean) - self.SIGMA ** 2 / 2, self.SIGMA))
+
+
+async def _ticker(lags, stop):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append((time.perf_counter() - t0 - TICK) * 1000)
+
+
+async def _session(agent, worker, n, args, speech, rng, results):
+    userdata = agent.Userdata(room=f"load-{worker}-{n}", customer_id=f"load-customer-{worker}-{n % args.customers}")
+    ctx = FakeRunContext(userdata, FakeSession(speech))
+    names, weights = zip(*((name, w) for name, (w, _) in JOURNEYS.items()))
+    await asyncio.sleep(rng.uniform(0, args.ramp))
+    for _ in range(args.journeys):
+        journey = rng.choices(names, weights)[0]
+        for tool, kwargs in JOURNEYS[journey][1]:
+            t_turn = time.perf_counter()
+            await speech.wait("stt")  # customer speaks, transcript final
+            await speech.wait("llm")  # LLM picks the tool
+            t0 = time.perf_counter()
+            try:
+                await getattr(agent, tool)(ctx, **kwargs)
+            except Exception as e:
+                results["errors"][f"{tool}: {type(e).__name__}: {e}"] += 1
+            results["tools"][tool].append((time.perf_counter() - t0) * 1000)
+            await speech.wait("llm")  # LLM phrases the answer
+            await speech.wait("tts")  # first audio
+            results["turns"].append((time.perf_counter() - t_turn) * 1000)
+        results["journeys"][journey] += 1
+    results["orders"] += len(userdata.orders)
+    await userdata.history.close()
+
+
+async def _run_worker(worker, args):
+    import agent  # after the environment is set up (journal path, trace dir)
+
+    rng = random.Random(worker)
+    speech = Speech({"stt": args.stt_ms, "llm": args.llm_ms, "tts": args.tts_ms}, args.speech_scale, rng)
+    results = {
+        "tools": defaultdict(list), "turns": [], "journeys": defaultdict(int),
+        "errors": defaultdict(int), "orders": 0,
+    }
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        _session(agent, worker, n, args, speech, rng, results) for n in range(args.sessions)
+    ))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await ticker
+    await agent.order_writer.aclose()
+    results.update(elapsed=elapsed, lags=lags, writer=agent.order_writer.stats())
+    return results
+
+
+def _worker(worker, args, start, out):
+    agent_results = None
+    try:
+        start.wait()
+        agent_results = asyncio.run(_run_worker(worker, args))
+    finally:
+        out.put((worker, agent_results and {
+            k: dict(v) if isinstance(v, defaultdict) else v for k, v in agent_results.items()
+        }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--procs", type=int, default=1, help="job processes")
+    parser.add_argument("--sessions", type=int, default=500, help="concurrent sessions per process")
+    parser.add_argument("--journeys", type=int, default=2, help="journeys per session")
+    parser.add_argument("--customers", type=int, default=200, help="distinct shoppers per process")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which sessions start")
+    parser.add_argument("--stt-ms", type=float, default=300)
+    parser.add_argument("--llm-ms", type=float, default=450)
+    parser.add_argument("--tts-ms", type=float, default=200)
+    parser.add_argument("--speech-scale", type=float, default=1.0, help="multiply speech latencies (0 = none)")
+    parser.add_argument("--stream-listings", action="store_true", help="run with STREAM_LISTINGS=1")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="loadtest-"))
+    journal = tmp / "orders.jsonl"
+    # spawned workers inherit these before they import agent
+    os.environ.update(
+        ORDERS_JOURNAL=str(journal), TRACE_DIR=str(tmp / "traces"), METRICS_DIR=str(tmp / "metrics"),
+        STREAM_LISTINGS="1" if args.stream_listings else "0",
+    )
+    ctx = mp.get_context("spawn")  # like the agent worker's job processes
+    start, out = ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(w, args, start, out)) for w in range(args.procs)]
+    for p in procs:
+        p.start()
+    t0 = time.perf_counter()
+    start.set()
+    results = [out.get() for _ in procs]
+    wall = time.perf_counter() - t0
+    for p in procs:
+        p.join()
+
+    failed = [w for w, r in results if r is None]
+    if failed:
+        sys.exit(f"worker(s) {failed} crashed; see their traceback above")
+    results = [r for _, r in sorted(results)]
+
+    tools = defaultdict(list)
+    for r in results:
+        for tool, times in r["tools"].items():
+            tools[tool].extend(times)
+    calls = sum(len(times) for times in tools.values())
+    turns = [t for r in results for t in r["turns"]]
+    lags = [lag for r in results for lag in r["lags"]]
+    orders = sum(r["orders"] for r in results)
+    journeys = defaultdict(int)
+    errors = defaultdict(int)
+    for r in results:
+        for name, count in r["journeys"].items():
+            journeys[name] += count
+        for error, count in r["errors"].items():
+            errors[error] += count
+    with open(journal, "rb") as f:
+        in_journal = len({json.loads(line)["id"] for line in f if line.strip()})
+
+    sessions = args.procs * args.sessions
+    print(f"sessions:   {args.procs} procs x {args.sessions} = {sessions}, {sum(journeys.values())} journeys "
+          f"({', '.join(f'{k} {v}' for k, v in sorted(journeys.items()))})")
+    print(f"elapsed:    {wall:.1f}s wall, speech latency x{args.speech_scale}")
+    print(f"throughput: {calls / wall:.0f} tool calls/s, {len(turns) / wall:.0f} turns/s, {orders / wall:.1f} orders/s")
+    print(f"turns:      p50 {_pct(turns, 0.5):.0f} ms  p99 {_pct(turns, 0.99):.0f} ms (speech stand-ins + tool)")
+    print(f"loop lag:   p50 {_pct(lags, 0.5):.2f} ms  p99 {_pct(lags, 0.99):.2f} ms  max {max(lags, default=0):.1f} ms")
+    print(f"\n{'tool':<22}{'calls':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for tool, times in sorted(tools.items()):
+        print(f"{tool:<22}{len(times):>8}{_pct(times, 0.5):>10.2f}{_pct(times, 0.99):>10.2f}{max(times):>10.1f}")
+    print("\norder store (per process):")
+    for w, r in enumerate(results):
+        print(f"  proc {w}: {r['writer']}, loop p99 lag {_pct(r['lags'], 0.99):.2f} ms")
+    print(f"orders:     {orders} placed, {in_journal} in the journal")
+    for error, count in sorted(errors.items(), key=lambda kv: -kv[1]):
+        print(f"error x{count}: {error}")
+    print(f"traces:     {tmp / 'traces'}")
+    sys.exit(1 if errors or in_journal != orders else 0)
+
+
+if __name__ == "__main__":
+    main()
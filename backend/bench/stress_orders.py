@@ -0,0 +1,96 @@
+"""Concurrency stress test for the shared order journal.
+
+Spawns N processes that place orders into the same journal at the same time
+(one of them also compacts periodically) and checks that every order survives.
+
+    python bench/stress_orders.py --procs 8 --orders 500
+    python bench/stress_orders.py --legacy   # old read-modify-write orders.json, for comparison
+
+Exits non-zero if any order was lost.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from order_store import OrderJournal
+
+
+def _journal_worker(path: str, worker: int, count: int, compact_every: int, start):
+    journal = OrderJournal(path, sync_batch=8)
+    start.wait()
+    for i in range(count):
+        journal.append({"id": f"w{worker}-{i}", "total": i, "currency": "INR"})
+        if compact_every and worker == 0 and i and i % compact_every == 0:
+            journal.compact()
+    journal.close()
+
+
+def _legacy_worker(path: str, worker: int, count: int, compact_every: int, start):
+    # what agent._save_order / orders.save_orders did before the journal
+    start.wait()
+    for i in range(count):
+        try:
+            with open(path) as f:
+                orders = json.load(f)
+        except Exception:
+            orders = []
+        orders.append({"id": f"w{worker}-{i}", "total": i, "currency": "INR"})
+        with open(path, "w") as f:
+            json.dump(orders, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--procs", type=int, default=8)
+    parser.add_argument("--orders", type=int, default=500, help="orders per process")
+    parser.add_argument("--compact-every", type=int, default=100)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="order-stress-")
+    path = os.path.join(tmp, "orders.json" if args.legacy else "orders.jsonl")
+    target = _legacy_worker if args.legacy else _journal_worker
+
+    start = mp.Event()
+    procs = [
+        mp.Process(target=target, args=(path, w, args.orders, args.compact_every, start))
+        for w in range(args.procs)
+    ]
+    for p in procs:
+        p.start()
+    t0 = time.perf_counter()
+    start.set()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+
+    if args.legacy:
+        try:
+            with open(path) as f:
+                orders = json.load(f)
+        except Exception:
+            orders = []
+    else:
+        orders = OrderJournal(path).read_all()
+
+    expected = args.procs * args.orders
+    found = len({o["id"] for o in orders})
+    lost = expected - found
+    print(f"mode:      {'legacy orders.json' if args.legacy else 'journal'}")
+    print(f"processes: {args.procs} x {args.orders} orders")
+    print(f"elapsed:   {elapsed:.2f}s ({expected / elapsed:.0f} orders/s)")
+    print(f"expected:  {expected}")
+    print(f"found:     {found}")
+    print(f"lost:      {lost}")
+    sys.exit(1 if lost else 0)
+
+
+if __name__ == "__main__":
+    main()
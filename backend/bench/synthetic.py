@@ -0,0 +1,74 @@
+"""Synthetic catalogs and order histories for the benchmarks in this directory."""
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from models import Product
+
+CATEGORIES = {
+    "mug": ("Ceramic Coffee Mug", "Travel Mug", "Espresso Cup", "Latte Mug"),
+    "hoodie": ("Cotton Hoodie", "Fleece Hoodie", "Zip Hoodie", "Oversized Hoodie"),
+    "tshirt": ("Cotton T-Shirt", "Graphic T-Shirt", "V-Neck T-Shirt", "Polo T-Shirt"),
+    "cap": ("Baseball Cap", "Trucker Cap", "Beanie", "Bucket Hat"),
+}
+COLORS = ("black", "white", "grey", "navy blue", "blue", "red", "green", "silver", "olive", "maroon")
+MATERIALS = ("cotton", "fleece", "ceramic", "stainless steel", "polyester", "wool blend")
+ADJECTIVES = ("classic", "premium", "comfortable", "trendy", "warm", "lightweight", "elegant", "durable")
+SIZES = ["S", "M", "L", "XL", "XXL"]
+
+
+def make_catalog(n: int, seed: int = 7) -> list[dict]:
+    """``n`` products in the flat agent.py shape."""
+    rng = random.Random(seed)
+    cats = list(CATEGORIES)
+    products = []
+    for i in range(n):
+        cat = cats[i % len(cats)]
+        base = rng.choice(CATEGORIES[cat])
+        color = rng.choice(COLORS)
+        products.append({
+            "id": f"{cat}-{i:06d}",
+            "name": f"{base} - {color.title()}",
+            "description": f"{rng.choice(ADJECTIVES).title()} {rng.choice(MATERIALS)} {base.lower()}",
+            "price": rng.randrange(199, 2999, 10),
+            "currency": "INR",
+            "category": cat,
+            "color": color,
+            "sizes": SIZES[: rng.randint(3, 5)] if cat in ("hoodie", "tshirt") else [],
+            "image_url": f"https://images.example.com/{cat}/{i:06d}.jpg",
+        })
+    return products
+
+
+def make_products(n: int, seed: int = 7) -> list[Product]:
+    """``make_catalog`` as the Product records the indexes are built from."""
+    return [Product.from_dict(p) for p in make_catalog(n, seed)]
+
+
+def make_orders(n: int, catalog: list[dict], customers: int = 1000, seed: int = 11) -> list[dict]:
+    """``n`` orders in the older agent.py order shape (items / total), oldest first."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    orders = []
+    for i in range(n):
+        items = []
+        for p in rng.sample(catalog, k=min(len(catalog), rng.randint(1, 3))):
+            qty = rng.randint(1, 3)
+            items.append({
+                "product_id": p["id"],
+                "name": p["name"],
+                "unit_price": p["price"],
+                "quantity": qty,
+                "line_total": p["price"] * qty,
+                "attrs": {},
+            })
+        c = rng.randrange(customers)
+        orders.append({
+            "id": f"order-{uuid.UUID(int=rng.getrandbits(128)).hex[:8]}",
+            "items": items,
+            "total": sum(it["line_total"] for it in items),
+            "currency": "INR",
+            "created_at": (start + timedelta(seconds=30 * i)).isoformat() + "Z",
+            "buyer": {"id": f"customer-{c}", "name": f"Customer {c}"},
+        })
+    return orders
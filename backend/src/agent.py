@@ -1,28 +1,46 @@
-import json
+import atexit
+import functools
 import logging
 import os
+import re
 import asyncio
+import time
 import uuid
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict, Optional, Annotated
+from types import SimpleNamespace
+from typing import AsyncIterator, Deque, Iterable, Iterator, List, Dict, Optional, Annotated, Tuple
 
 from dotenv import load_dotenv
 from pydantic import Field
 from livekit.agents import (
     Agent,
     AgentSession,
+    ChatContext,
+    ChatMessage,
     JobContext,
     JobProcess,
+    MetricsCollectedEvent,
     RoomInputOptions,
     WorkerOptions,
     cli,
     function_tool,
     RunContext,
+    StopResponse,
+    metrics,
 )
 
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+import catalog
+import intents
+import latency
+from cache import TTLCache
+from cart import Cart
+from catalog_index import CatalogIndex
+from models import Order, OrderLine, Product
+from order_store import AsyncOrderWriter, OrderIndex, default_journal
+from resolver import FILLER, ORDINALS
+from session_trace import Action, SessionHistory
 
 # -------------------------
 # Logging
@@ -36,155 +54,135 @@ logger.addHandler(handler)
 load_dotenv(".env.local")
 
 # -------------------------
-# Simple Product Catalog (StyleHub Store)
+# Speech plugins (imported on first use)
 # -------------------------
-# A modern catalog with attributes: id, name, price (INR), category, color, sizes
-CATALOG = [
-    {
-        "id": "mug-001",
-        "name": "Ceramic Coffee Mug - White",
-        "description": "Classic white ceramic mug, 350ml capacity",
-        "price": 299,
-        "currency": "INR",
-        "category": "mug",
-        "color": "white",
-        "sizes": [],
-    },
-    {
-        "id": "mug-002",
-        "name": "Ceramic Coffee Mug - Black",
-        "description": "Elegant black ceramic mug, 350ml capacity",
-        "price": 299,
-        "currency": "INR",
-        "category": "mug",
-        "color": "black",
-        "sizes": [],
-    },
-    {
-        "id": "mug-003",
-        "name": "Travel Mug - Stainless Steel",
-        "description": "Insulated travel mug, keeps drinks hot for 6 hours",
-        "price": 599,
-        "currency": "INR",
-        "category": "mug",
-        "color": "silver",
-        "sizes": [],
-    },
-    {
-        "id": "hoodie-001",
-        "name": "Cotton Hoodie - Black",
-        "description": "Comfortable cotton hoodie with front pocket",
-        "price": 1299,
-        "currency": "INR",
-        "category": "hoodie",
-        "color": "black",
-        "sizes": ["S", "M", "L", "XL"],
-    },
-    {
-        "id": "hoodie-002",
-        "name": "Cotton Hoodie - Navy Blue",
-        "description": "Premium navy blue hoodie with zipper",
-        "price": 1499,
-        "currency": "INR",
-        "category": "hoodie",
-        "color": "navy blue",
-        "sizes": ["S", "M", "L", "XL"],
-    },
-    {
-        "id": "hoodie-003",
-        "name": "Fleece Hoodie - Grey",
-        "description": "Warm fleece hoodie perfect for winter",
-        "price": 1799,
-        "currency": "INR",
-        "category": "hoodie",
-        "color": "grey",
-        "sizes": ["M", "L", "XL", "XXL"],
-    },
-    # T-shirts
-    {
-        "id": "tshirt-001",
-        "name": "Cotton T-Shirt - White",
-        "description": "Basic white cotton t-shirt",
-        "price": 399,
-        "currency": "INR",
-        "category": "tshirt",
-        "color": "white",
-        "sizes": ["S", "M", "L", "XL"],
-    },
-    {
-        "id": "tshirt-002",
-        "name": "Cotton T-Shirt - Black",
-        "description": "Classic black cotton t-shirt",
-        "price": 399,
-        "currency": "INR",
-        "category": "tshirt",
-        "color": "black",
-        "sizes": ["S", "M", "L", "XL"],
-    },
-    {
-        "id": "tshirt-003",
-        "name": "Graphic T-Shirt - Blue",
-        "description": "Trendy graphic print t-shirt",
-        "price": 599,
-        "currency": "INR",
-        "category": "tshirt",
-        "color": "blue",
-        "sizes": ["S", "M", "L", "XL"],
-    },
-    {
-        "id": "tshirt-004",
-        "name": "V-Neck T-Shirt - Grey",
-        "description": "Stylish v-neck t-shirt",
-        "price": 499,
-        "currency": "INR",
-        "category": "tshirt",
-        "color": "grey",
-        "sizes": ["S", "M", "L", "XL"],
-    },
-]
+# The plugins pull in SDK clients and model runtimes, which is most of the cost of
+# importing this module. Job processes import them in prewarm, before their first
+# room, and anything else that imports agent.py (benchmarks, the load-test harness)
+# never pays for them. The worker process imports them up front (see __main__):
+# plugins register themselves on import, and `download-files` and the turn
+# detector's inference process depend on that.
+@functools.cache
+def plugins() -> SimpleNamespace:
+    """The speech plugin modules; call from the main thread (plugins register on import)."""
+    from livekit.plugins import deepgram, google, murf, noise_cancellation, silero
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+    return SimpleNamespace(
+        murf=murf, silero=silero, google=google, deepgram=deepgram,
+        noise_cancellation=noise_cancellation, MultilingualModel=MultilingualModel,
+    )
+
+
+# -------------------------
+# Product Catalog (StyleHub Store)
+# -------------------------
+# Products live in catalog.jsonl and are loaded, indexed and hot-reloaded by catalog.py.
+# Each product is a models.Product: id, name, price (INR), category, color, sizes, ...
+
+
+def get_catalog_index() -> CatalogIndex:
+    """Current catalog index; fetch once per tool call so a reload can't change it mid-call."""
+    return catalog.get_index()
+
+
+# Rendered show_catalog answers shared by every session in this process; entries are
+# dropped whenever the catalog index is rebuilt (new version)
+catalog_render_cache = TTLCache("show_catalog", maxsize=512, ttl=900.0)
+
+# How many products show_catalog reads out
+CATALOG_LISTING_SIZE = 4
+
+# Speak catalog / order listings straight to TTS line by line instead of returning one
+# block for the LLM to read back, so audio starts with the first line
+STREAM_LISTINGS = os.getenv("STREAM_LISTINGS", "0") == "1"
+
+# Below this resolver confidence, ask the customer to clarify instead of guessing
+MIN_REF_CONFIDENCE = 0.5
+# A match inside a recent listing wins outright only above this, and only if it
+# accounts for every word of the reference
+MIN_LISTING_REF_CONFIDENCE = 0.8
+
+# Result lists read out by show_catalog that follow-ups ("the second one") resolve against
+RECENT_RESULTS_MAX = 3
+RECENT_RESULTS_TTL = 300.0  # seconds before a listing is considered stale
 
 # Storage for cart and orders per session
 
-ORDERS_FILE = "orders.json"
+# Orders live in the journal shared with orders.py / the HTTP API (see order_store.py),
+# next to the code rather than in whatever directory the worker was started from.
+# Opening it only checks that the file exists; orders are read on the first order
+# question. Legacy orders.json files (the working directory's and the one beside the
+# code) are each imported once.
+order_journal = default_journal()
+atexit.register(order_journal.close)
 
-# ensure orders file exists
-if not os.path.exists(ORDERS_FILE):
-    with open(ORDERS_FILE, "w") as f:
-        json.dump([], f)
+# Tools run on the job's event loop; journal I/O goes through this writer so a checkout
+# or a history read never stalls audio for the session
+order_writer = AsyncOrderWriter(order_journal)
+
+# Byte offsets of every order, so history questions read only the records they need
+order_index = OrderIndex(order_journal)
 
 # -------------------------
 # Per-session Userdata (shopping-centric)
 # -------------------------
+@dataclass
+class ShownResults:
+    product_ids: Tuple[str, ...]  # in the order they were read out
+    shown_at: float = field(default_factory=time.monotonic)
+
+
 @dataclass
 class Userdata:
     player_name: Optional[str] = None  # retained name field (player -> customer)
+    customer_id: Optional[str] = None  # participant identity of the shopper
     session_id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
+    room: Optional[str] = None  # LiveKit room name (metrics label)
+    job_started: float = field(default_factory=time.perf_counter)  # for time-to-greeting
     started_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
-    cart: List[Dict] = field(default_factory=list)  # list of {product_id, quantity, attrs}
-    orders: List[Dict] = field(default_factory=list)  # orders placed in this session
-    history: List[Dict] = field(default_factory=list)  # conversational actions for trace
+    cart: Cart = field(default_factory=Cart)
+    orders: List[Order] = field(default_factory=list)  # orders placed in this session
+    history: SessionHistory = field(init=False)  # cart / order actions (see session_trace.py)
+    recent_results: Deque[ShownResults] = field(
+        default_factory=lambda: deque(maxlen=RECENT_RESULTS_MAX)
+    )  # newest last
+    llm_ttft: Optional[float] = None  # recent LLM first-token latency (moving average)
+
+    def __post_init__(self):
+        self.history = SessionHistory(self.session_id, self.room)
 
 # -------------------------
 # Merchant-layer helpers (ACP-inspired mini layer)
 # -------------------------
 
-def _load_all_orders() -> List[Dict]:
-    try:
-        with open(ORDERS_FILE, "r") as f:
-            return json.load(f)
-    except Exception:
-        return []
+def customer_of(userdata: Userdata) -> str:
+    """Key this shopper's orders are filed under: participant identity, else name, else the session."""
+    return userdata.customer_id or userdata.player_name or f"session-{userdata.session_id}"
+
+
+def buyer_of(userdata: Userdata) -> Dict[str, str]:
+    return {"id": customer_of(userdata), "name": userdata.player_name or "Guest"}
+
+
+async def _save_order(order: Order):
+    # single append to the journal; returns once it is on disk
+    await order_writer.append(order.to_dict())
 
 
-def _save_order(order: Dict):
-    orders = _load_all_orders()
-    orders.append(order)
-    with open(ORDERS_FILE, "w") as f:
-        json.dump(orders, f, indent=2)
+def normalize_category(category: str) -> str:
+    """Map category synonyms to catalog categories (e.g., 'phones' -> 'mobile')."""
+    cat = category.lower()
+    if cat in ("phone", "phones", "mobile", "mobile phone", "mobiles"):
+        return "mobile"
+    if cat in ("tshirt", "t-shirts", "tees", "tee"):
+        return "tshirt"
+    return cat
 
 
-def list_products(filters: Optional[Dict] = None) -> List[Dict]:
-    """Naive filtering by category, max_price, color, size substring, or query words.
+def list_products(filters: Optional[Dict] = None, limit: Optional[int] = None) -> List[Product]:
+    """Filter by category, max_price, color, size, or query words via the catalog index.
+    Query words are ranked by relevance (BM25); ``limit`` keeps only the top results.
 
     Improvements:
     - Accepts category synonyms (e.g., 'phone', 'mobile', 'phones' -> 'mobile').
@@ -192,7 +190,6 @@ def list_products(filters: Optional[Dict] = None) -> List[Dict]:
     - Matches category by substring if exact match fails.
     """
     filters = filters or {}
-    results = []
     query = filters.get("q")
     category = filters.get("category")
     max_price = filters.get("max_price") or filters.get("to") or filters.get("max")
@@ -200,243 +197,201 @@ def list_products(filters: Optional[Dict] = None) -> List[Dict]:
     color = filters.get("color")
     size = filters.get("size")
 
-    # normalize category synonyms
     if category:
-        cat = category.lower()
-        if cat in ("phone", "phones", "mobile", "mobile phone", "mobiles"):
-            category = "mobile"
-        elif cat in ("tshirt", "t-shirts", "tees", "tee"):
-            category = "tshirt"
-        else:
-            category = cat
-
-    for p in CATALOG:
-        ok = True
-        # category matching: allow substring matches if direct equality fails
-        if category:
-            pcat = p.get("category", "").lower()
-            if pcat != category and category not in pcat and pcat not in category:
-                ok = False
-        if max_price:
-            try:
-                if p.get("price", 0) > int(max_price):
-                    ok = False
-            except Exception:
-                pass
-        if min_price:
-            try:
-                if p.get("price", 0) < int(min_price):
-                    ok = False
-            except Exception:
-                pass
-        if color and p.get("color") and p.get("color") != color:
-            ok = False
-        if size and (not p.get("sizes") or size not in p.get("sizes")):
-            ok = False
-        if query:
-            q = query.lower()
-            # if query mentions 'phone' or 'mobile', accept mobile category too
-            if "phone" in q or "mobile" in q:
-                if p.get("category") != "mobile":
-                    ok = False
-            else:
-                if q not in p.get("name", "").lower() and q not in p.get("description", "").lower():
-                    ok = False
-        if ok:
-            results.append(p)
-    return results
-
-
-def find_product_by_ref(ref_text: str, candidates: Optional[List[Dict]] = None) -> Optional[Dict]:
-    """Resolve references like 'second hoodie' or 'black hoodie' to a product dict.
-    Heuristics improved:
-    - Handle ordinals like 'first/second/third' within a filtered candidate list.
-    - If ref mentions 'phone' or 'mobile' prefer mobile category products.
-    - Match by id, color+category, name substring, or numeric index.
-    """
-    ref = (ref_text or "").lower().strip()
-    cand = candidates if candidates is not None else CATALOG
-
-    # prefer mobiles if user explicitly mentions phone/mobile
-    wants_mobile = any(w in ref for w in ("phone", "phones", "mobile", "mobiles"))
-    filtered = cand
-    if wants_mobile:
-        filtered = [p for p in cand if p.get("category") == "mobile"]
-        if not filtered:
-            filtered = cand
-
-    # ordinal handling
-    ordinals = {"first": 0, "second": 1, "third": 2, "fourth": 3}
-    for word, idx in ordinals.items():
-        if word in ref:
-            if idx < len(filtered):
-                return filtered[idx]
-
-    # direct id match
-    for p in cand:
-        if p["id"].lower() == ref:
-            return p
-
-    # color + category matching
-    for p in cand:
-        if p.get("color") and p["color"] in ref and p.get("category") and p["category"] in ref:
-            return p
-
-    # name substring or keywords
-    for p in filtered:
-        name = p["name"].lower()
-        if all(tok in name for tok in ref.split() if len(tok) > 2):
-            return p
-    for p in cand:
-        for tok in ref.split():
-            if len(tok) > 2 and tok in p["name"].lower():
-                return p
-
-    # numeric index like '2' -> second
-    for token in ref.split():
-        if token.isdigit():
-            idx = int(token) - 1
-            if 0 <= idx < len(filtered):
-                return filtered[idx]
-
-    # fallback: if user said 'second phone' but we couldn't match earlier, try overall cand ordinals
-    for word, idx in ordinals.items():
-        if word in ref and idx < len(cand):
-            return cand[idx]
-
-    return None
-
+        category = normalize_category(category)
 
-@function_tool
-async def show_catalog(
-    ctx: RunContext[Userdata],
-    q: Annotated[Optional[str], Field(description="Search query (optional)", default=None)] = None,
-    category: Annotated[Optional[str], Field(description="Category (optional)", default=None)] = None,
-    max_price: Annotated[Optional[int], Field(description="Maximum price (optional)", default=None)] = None,
-    color: Annotated[Optional[str], Field(description="Color (optional)", default=None)] = None,
-) -> str:
-    """Return a short spoken summary of matching products (name, price, id).
-    Improvements:
-    - Recognize category synonyms like 'phones' and 'tees'.
-    - Return up to 8 items and explicitly call out mobiles if present.
-    """
-    userdata = ctx.userdata
-    # try to normalize category input
+    index = get_catalog_index()
+    postings = []
+    # category matching: allow substring matches if direct equality fails
     if category:
-        cat = category.lower()
-        if cat in ("phone", "phones", "mobile", "mobile phone", "mobiles"):
-            category = "mobile"
-        elif cat in ("tshirt", "t-shirts", "tees", "tee"):
-            category = "tshirt"
-        else:
-            category = cat
-    # If query mentions phones, prefer category mobile
-    if not category and q:
-        if any(w in q.lower() for w in ("phone", "phones", "mobile", "mobiles")):
-            category = "mobile"
-        if any(w in q.lower() for w in ("tee", "tshirt", "t-shirts", "tees")):
-            category = "tshirt"
-
-    filters = {"q": q, "category": category, "max_price": max_price, "color": color}
-    prods = list_products({k: v for k, v in filters.items() if v is not None})
-    if not prods:
-        return "Sorry — I couldn't find any items that match. Would you like to try another search?"
-    # Summarize top 8
-    lines = [f"Here are the top {min(8, len(prods))} items I found:"]
-    for idx, p in enumerate(prods[:8], start=1):
-        size_info = f" (sizes: {', '.join(p['sizes'])})" if p.get('sizes') else ""
-        lines.append(f"{idx}. {p['name']} — {p['price']} {p['currency']} (id: {p['id']}){size_info}")
-    lines.append("You can say: 'I want the second item in size M' or 'add mug-001 to my cart, quantity 2'.")
-    # If mobiles were in results, add a short phrasing hint
-    if any(p.get('category') == 'mobile' for p in prods):
-        lines.append("To buy a phone say: 'Add phone-002 to my cart' or 'I want the second phone, quantity 1'.")
-    return "\n".join(lines)
-
-
-def find_product_by_ref(ref_text: str, candidates: Optional[List[Dict]] = None) -> Optional[Dict]:
-    """Resolve references like 'second hoodie' or 'black hoodie' to a product dict.
-    Very simple heuristic: look for ordinal words, color or exact id/name matching.
+        postings.append(index.category(category, partial=True))
+    try:
+        lo = int(min_price) if min_price else None
+    except Exception:
+        lo = None
+    try:
+        hi = int(max_price) if max_price else None
+    except Exception:
+        hi = None
+    if lo is not None or hi is not None:
+        postings.append(index.price_range(lo, hi))
+    if color:
+        # products without a color are not excluded by a color filter
+        postings.append(index.color(color, include_missing=True))
+    if size:
+        postings.append(index.size(size))
+    q = query.lower() if query else None
+    # if query mentions 'phone' or 'mobile', accept mobile category too
+    if q and ("phone" in q or "mobile" in q):
+        postings.append(index.category("mobile"))
+        q = None
+
+    if q:
+        # ranked full-text search, restricted to the attribute filters if any
+        return index.search(q, k=limit, within=index.select(*postings) if postings else None)
+    results = index.select(*postings)
+    return results[:limit] if limit else results
+
+
+def find_product_by_ref(ref_text: str, candidates: Optional[List[Product]] = None) -> Optional[Product]:
+    """Resolve references like 'second hoodie', 'navy hoody' or 'mug-001' to a product.
+    Ordinals and bare numbers index into ``candidates`` when given; misheard words are
+    fuzzy-matched. Returns None below MIN_REF_CONFIDENCE.
     """
-    ref = (ref_text or "").lower().strip()
-    cand = candidates if candidates is not None else CATALOG
-
-    # ordinal handling
-    ordinals = {"first": 0, "second": 1, "third": 2}
-    for word, idx in ordinals.items():
-        if word in ref:
-            if idx < len(cand):
-                return cand[idx]
-
-    # direct id match
-    for p in cand:
-        if p["id"].lower() == ref:
-            return p
-
-    # color + category matching
-    for p in cand:
-        if p.get("color") and p["color"] in ref and p.get("category") and p["category"] in ref:
-            return p
-
-    # name substring
-    for p in cand:
-        if p["name"].lower() in ref or any(w in p["name"].lower() for w in ref.split()):
-            return p
-
-    # fallback: if a number present, try to parse as '2nd of last list'
-    for token in ref.split():
-        if token.isdigit():
-            idx = int(token) - 1
-            if 0 <= idx < len(cand):
-                return cand[idx]
-
-    return None
-
-
-def create_order_object(line_items: List[Dict], currency: str = "INR") -> Dict:
-    """line_items: [{product_id, quantity, attrs}]
-    Returns an order dict (id, items, total, currency, created_at)
+    match = get_catalog_index().resolver.resolve(ref_text, candidates)
+    if match is None or match.confidence < MIN_REF_CONFIDENCE:
+        return None
+    return match.product
+
+
+def fresh_results(userdata: Userdata) -> List[ShownResults]:
+    """Recent listings, newest first; stale ones are evicted."""
+    recent = userdata.recent_results
+    cutoff = time.monotonic() - RECENT_RESULTS_TTL
+    while recent and recent[0].shown_at < cutoff:
+        recent.popleft()
+    return list(reversed(recent))
+
+
+def resolve_session_ref(userdata: Userdata, ref_text: str) -> Optional[Product]:
+    """Resolve a reference against what this session was just shown, then the catalog.
+    Ordinals only apply to the newest listing. A listing match that leaves words of
+    the reference unmatched ('black mug' after a hoodie listing) doesn't win by being
+    recent: the better of it and the catalog match is taken."""
+    index = get_catalog_index()
+    best = None
+    for i, shown in enumerate(fresh_results(userdata)):
+        candidates = [p for p in map(index.get, shown.product_ids) if p]
+        match = index.resolver.resolve(ref_text, candidates)
+        if match is None or (i > 0 and match.method == "ordinal"):
+            continue
+        if match.unmatched == 0 and match.confidence >= MIN_LISTING_REF_CONFIDENCE:
+            return match.product
+        if best is None or match.confidence > best.confidence:
+            best = match
+    match = index.resolver.resolve(ref_text)
+    if match is not None and (best is None or match.confidence > best.confidence):
+        best = match
+    if best is None or best.confidence < MIN_REF_CONFIDENCE:
+        return None
+    return best.product
+
+
+# words that only say which cart line is meant ('remove the second one from my cart')
+_LINE_FILLER = FILLER | {"the", "a", "from", "line", "remove", "delete", "drop", "change", "set", "make", "update"}
+
+
+def resolve_cart_line(cart: Cart, ref_text: str, size: Optional[str] = None) -> Tuple[Optional[OrderLine], str]:
+    """Find the cart line a reference means: a position as read out ('the second one',
+    'item 2', 'last') or a product in the cart ('the hoodie'), narrowed by size.
+    Returns (line, "") or (None, what to tell the customer)."""
+    words = [w for w in re.findall(r"[a-z0-9]+", (ref_text or "").lower()) if w not in _LINE_FILLER]
+    if len(words) == 1 and (words[0] in ORDINALS or words[0].isdigit()):
+        line = cart.line_at(ORDINALS[words[0]] if words[0] in ORDINALS else int(words[0]) - 1)
+        if line is None:
+            return None, f"Your cart only has {len(cart)} item{'s' if len(cart) != 1 else ''}."
+        return line, ""
+    index = get_catalog_index()
+    candidates = [p for p in map(index.get, cart.product_ids()) if p]
+    match = index.resolver.resolve(ref_text, candidates) if candidates else None
+    if match is None or match.confidence < MIN_REF_CONFIDENCE:
+        return None, "I couldn't tell which item in your cart you meant. Say 'show cart' to hear them."
+    lines = cart.lines_for(match.product.id, size)
+    if not lines:
+        return None, f"There's no {match.product.name} in size {size} in your cart."
+    if len(lines) > 1:
+        sizes = " or ".join(line.size or "no size" for line in lines)
+        return None, f"You have {match.product.name} in more than one size: {sizes}. Which one?"
+    return lines[0], ""
+
+
+async def create_order_object(cart: Cart, buyer: Optional[Dict[str, str]] = None) -> Order:
+    """Persist the cart's lines as an order and return it.
+
+    Lines keep the prices they were added at unless the catalog has been
+    reloaded since; lines for products no longer in the catalog are dropped
+    from the cart first (see Cart.reprice).
     """
-    items = []
-    total = 0
-    for li in line_items:
-        pid = li.get("product_id")
-        qty = int(li.get("quantity", 1))
-        prod = next((p for p in CATALOG if p["id"] == pid), None)
-        if not prod:
-            raise ValueError(f"Product {pid} not found")
-        line_total = prod["price"] * qty
-        total += line_total
-        items.append({
-            "product_id": pid,
-            "name": prod["name"],
-            "unit_price": prod["price"],
-            "quantity": qty,
-            "line_total": line_total,
-            "attrs": li.get("attrs", {}),
-        })
-    order = {
-        "id": f"order-{str(uuid.uuid4())[:8]}",
-        "items": items,
-        "total": total,
-        "currency": currency,
-        "created_at": datetime.utcnow().isoformat() + "Z",
-    }
+    cart.reprice(get_catalog_index())
+    if not cart:
+        raise ValueError("Cart is empty")
+    order = Order(
+        id=f"order-{str(uuid.uuid4())[:8]}",
+        status="CONFIRMED",
+        lines=cart.to_order_lines(),
+        total=cart.total,
+        currency=cart.currency,
+        created_at=datetime.utcnow().isoformat() + "Z",
+        buyer=buyer,
+    )
     # persist
-    _save_order(order)
+    await _save_order(order)
     return order
 
 
-def get_most_recent_order() -> Optional[Dict]:
-    all_orders = _load_all_orders()
-    if not all_orders:
-        return None
-    return all_orders[-1]
+async def get_recent_orders(n: int = 1, customer: Optional[str] = None) -> List[Order]:
+    """The n most recent orders (only ``customer``'s if given), newest first; reads only those records."""
+    try:
+        return [Order.from_dict(o) for o in await asyncio.to_thread(order_index.last, n, customer)]
+    except Exception:
+        logger.exception("Failed to read order journal")
+        return []
+
+
+async def get_most_recent_order(customer: Optional[str] = None) -> Optional[Order]:
+    orders = await get_recent_orders(1, customer)
+    return orders[0] if orders else None
+
+# -------------------------
+# Latency instrumentation (see latency.py)
+# -------------------------
+# How often job processes write their histograms for /metrics (seconds)
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+
+def metric_labels(userdata: Userdata) -> Dict[str, str]:
+    return {"session_id": userdata.session_id, "room": userdata.room or ""}
+
+
+def timed_tool(fn):
+    """Record each call of a tool under voice_tool_seconds (apply below @function_tool)."""
+    @functools.wraps(fn)
+    async def wrapper(ctx: RunContext[Userdata], *args, **kwargs):
+        t0 = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await fn(ctx, *args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            latency.RECORDER.observe(
+                "voice_tool_seconds", time.perf_counter() - t0,
+                tool=fn.__name__, outcome=outcome, **metric_labels(ctx.userdata),
+            )
+    return wrapper
+
+
+def record_pipeline_metrics(userdata: Userdata, m) -> None:
+    """Turn the session's metrics events into per-stage latency observations."""
+    labels = metric_labels(userdata)
+    if isinstance(m, metrics.EOUMetrics):
+        # end of speech -> final transcript, and -> the decision that the user is done
+        latency.RECORDER.observe("voice_turn_stage_seconds", m.transcription_delay, stage="stt_final", **labels)
+        latency.RECORDER.observe("voice_turn_stage_seconds", m.end_of_utterance_delay, stage="end_of_utterance", **labels)
+    elif isinstance(m, metrics.LLMMetrics) and m.ttft >= 0:
+        latency.RECORDER.observe("voice_turn_stage_seconds", m.ttft, stage="llm_first_token", **labels)
+        # what a fast-path turn is estimated to save
+        userdata.llm_ttft = m.ttft if userdata.llm_ttft is None else 0.8 * userdata.llm_ttft + 0.2 * m.ttft
+    elif isinstance(m, metrics.TTSMetrics) and m.ttfb >= 0:
+        latency.RECORDER.observe("voice_turn_stage_seconds", m.ttfb, stage="tts_first_audio", **labels)
+
 
 # -------------------------
 # Agent Tools (function_tool) exposed to the LLM layer
 # -------------------------
 
 @function_tool
+@timed_tool
 async def show_catalog(
     ctx: RunContext[Userdata],
     q: Annotated[Optional[str], Field(description="Search query (optional)", default=None)] = None,
@@ -446,19 +401,40 @@ async def show_catalog(
 ) -> str:
     """Return a short spoken summary of matching products (name, price, id)."""
     userdata = ctx.userdata
+    # cache key: filters normalized so equivalent requests share one entry
+    key = (
+        " ".join(q.lower().split()) if q else None,
+        normalize_category(category) if category else None,
+        max_price,
+        color.lower() if color else None,
+    )
+    ids, text = catalog_render_cache.get_or_compute(
+        key, get_catalog_index().version, lambda: _render_catalog(*key)
+    )
+    if ids:
+        userdata.recent_results.append(ShownResults(ids))
+        if STREAM_LISTINGS:
+            return speak_listing(ctx, text.split("\n"))
+    return text
+
+
+def _render_catalog(
+    q: Optional[str], category: Optional[str], max_price: Optional[int], color: Optional[str]
+) -> Tuple[Tuple[str, ...], str]:
     filters = {"q": q, "category": category, "max_price": max_price, "color": color}
-    prods = list_products({k: v for k, v in filters.items() if v is not None})
+    prods = list_products({k: v for k, v in filters.items() if v is not None}, limit=CATALOG_LISTING_SIZE)
     if not prods:
-        return "Sorry — I couldn't find any items that match. Would you like to try another search?"
-    # Summarize top 4
-    lines = [f"Here are the top {min(4, len(prods))} items I found:"]
-    for idx, p in enumerate(prods[:4], start=1):
-        lines.append(f"{idx}. {p['name']} — {p['price']} {p['currency']} (id: {p['id']})")
+        return (), "Sorry — I couldn't find any items that match. Would you like to try another search?"
+    # Summarize top CATALOG_LISTING_SIZE
+    lines = [f"Here are the top {len(prods)} items I found:"]
+    for idx, p in enumerate(prods, start=1):
+        lines.append(f"{idx}. {p.name} — {p.price} {p.currency} (id: {p.id})")
     lines.append("You can say: 'I want the second item in size M' or 'add mug-001 to my cart, quantity 2'.")
-    return "\n".join(lines)
+    return tuple(p.id for p in prods), "\n".join(lines)
 
 
 @function_tool
+@timed_tool
 async def add_to_cart(
     ctx: RunContext[Userdata],
     product_ref: Annotated[str, Field(description="Reference to product: id, name, or spoken ref")] ,
@@ -467,59 +443,49 @@ async def add_to_cart(
 ) -> str:
     """Resolve a product and add to the session cart."""
     userdata = ctx.userdata
-    # take recent catalog as candidates
-    candidates = CATALOG
-    prod = find_product_by_ref(product_ref, candidates)
+    prod = resolve_session_ref(userdata, product_ref)
     if not prod:
         return "I couldn't resolve which product you meant. Try using the item id or say 'show catalog' to hear options.'"
-    userdata.cart.append({
-        "product_id": prod["id"],
-        "quantity": int(quantity),
-        "attrs": {"size": size} if size else {},
-    })
-    userdata.history.append({
-        "time": datetime.utcnow().isoformat() + "Z",
-        "action": "add_to_cart",
-        "product_id": prod["id"],
-        "quantity": int(quantity),
-    })
-    return f"Added {quantity} x {prod['name']} to your cart. What would you like to do next?"
+    if quantity < 1:
+        return "How many would you like? The quantity has to be at least 1."
+    line = userdata.cart.add(prod, int(quantity), size, catalog_version=get_catalog_index().version)
+    userdata.history.record(Action.ADD_TO_CART, prod.id, int(quantity))
+    if line.quantity > quantity:
+        return f"Added {quantity} more {prod.name}; you now have {line.quantity} in your cart. What would you like to do next?"
+    return f"Added {quantity} x {prod.name} to your cart. What would you like to do next?"
 
 
 @function_tool
+@timed_tool
 async def show_cart(
     ctx: RunContext[Userdata],
 ) -> str:
     userdata = ctx.userdata
     if not userdata.cart:
         return "Your cart is empty. You can say 'show catalog' to browse items.'"
+    cart = userdata.cart
     lines = ["Items in your cart:"]
-    total = 0
-    for li in userdata.cart:
-        p = next((x for x in CATALOG if x["id"] == li["product_id"]), None)
-        if not p:
-            continue
-        line_total = p["price"] * li.get("quantity", 1)
-        total += line_total
-        sz = li.get("attrs", {}).get("size")
-        sz_text = f", size {sz}" if sz else ""
-        lines.append(f"- {p['name']} x {li['quantity']}{sz_text}: {line_total} INR")
-    lines.append(f"Cart total: {total} INR")
-    lines.append("Say 'place my order' to checkout or 'clear cart' to empty the cart.")
+    for i, li in enumerate(cart, start=1):
+        sz_text = f", size {li.size}" if li.size else ""
+        lines.append(f"{i}. {li.name} x {li.quantity}{sz_text}: {li.line_total} {cart.currency}")
+    lines.append(f"Cart total: {cart.total} {cart.currency}")
+    lines.append("Say 'place my order' to checkout, 'remove the second item' or 'make it 2 of the first one'.")
     return "\n".join(lines)
 
 
 @function_tool
+@timed_tool
 async def clear_cart(
     ctx: RunContext[Userdata],
 ) -> str:
     userdata = ctx.userdata
-    userdata.cart = []
-    userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "clear_cart"})
+    userdata.cart.clear()
+    userdata.history.record(Action.CLEAR_CART)
     return "Your cart has been cleared. What would you like to do next?"
 
 
 @function_tool
+@timed_tool
 async def place_order(
     ctx: RunContext[Userdata],
     confirm: Annotated[bool, Field(description="Confirm order placement", default=True)] = True,
@@ -528,38 +494,157 @@ async def place_order(
     userdata = ctx.userdata
     if not userdata.cart:
         return "Your cart is empty — nothing to place. Would you like to browse items?"
-    # Build line_items
-    line_items = []
-    for li in userdata.cart:
-        line_items.append({
-            "product_id": li["product_id"],
-            "quantity": li.get("quantity", 1),
-            "attrs": li.get("attrs", {}),
-        })
-    order = create_order_object(line_items)
+    dropped = userdata.cart.reprice(get_catalog_index())
+    note = f"{', '.join(li.name for li in dropped)} {'is' if len(dropped) == 1 else 'are'} no longer available and was removed. " if dropped else ""
+    if not userdata.cart:
+        return note + "Your cart is empty — nothing to place. Would you like to browse items?"
+    order = await create_order_object(userdata.cart, buyer=buyer_of(userdata))
     userdata.orders.append(order)
-    userdata.history.append({"time": datetime.utcnow().isoformat() + "Z", "action": "place_order", "order_id": order["id"]})
+    userdata.history.record(Action.PLACE_ORDER, order.id)
     # clear cart after order
-    userdata.cart = []
-    return f"Order placed. Order ID {order['id']}. Total {order['total']} {order['currency']}. What would you like to do next?"
+    userdata.cart.clear()
+    return f"{note}Order placed. Order ID {order.id}. Total {order.total} {order.currency}. What would you like to do next?"
+
+
+@function_tool
+@timed_tool
+async def remove_from_cart(
+    ctx: RunContext[Userdata],
+    item: Annotated[str, Field(description="Which cart item: its position ('second', '2'), name or id")],
+    size: Annotated[Optional[str], Field(description="Size, if the item is in the cart in more than one size", default=None)] = None,
+) -> str:
+    """Remove one line from the session cart."""
+    userdata = ctx.userdata
+    if not userdata.cart:
+        return "Your cart is already empty."
+    line, problem = resolve_cart_line(userdata.cart, item, size)
+    if line is None:
+        return problem
+    userdata.cart.remove(line)
+    userdata.history.record(Action.REMOVE_FROM_CART, line.product_id)
+    return f"Removed {line.name} from your cart. Cart total is now {userdata.cart.total} {userdata.cart.currency}."
+
+
+@function_tool
+@timed_tool
+async def update_cart_quantity(
+    ctx: RunContext[Userdata],
+    item: Annotated[str, Field(description="Which cart item: its position ('second', '2'), name or id")],
+    quantity: Annotated[int, Field(description="New quantity (0 removes the item)")],
+    size: Annotated[Optional[str], Field(description="Size, if the item is in the cart in more than one size", default=None)] = None,
+) -> str:
+    """Set the quantity of one line in the session cart."""
+    userdata = ctx.userdata
+    if not userdata.cart:
+        return "Your cart is empty. You can say 'show catalog' to browse items."
+    if quantity < 0:
+        return "The quantity can't be negative."
+    line, problem = resolve_cart_line(userdata.cart, item, size)
+    if line is None:
+        return problem
+    userdata.cart.update_quantity(line, int(quantity))
+    userdata.history.record(Action.UPDATE_CART_QUANTITY, line.product_id, int(quantity))
+    if quantity == 0:
+        return f"Removed {line.name} from your cart. Cart total is now {userdata.cart.total} {userdata.cart.currency}."
+    return f"You now have {quantity} x {line.name}. Cart total is now {userdata.cart.total} {userdata.cart.currency}."
 
 
 @function_tool
+@timed_tool
 async def last_order(
     ctx: RunContext[Userdata],
 ) -> str:
-    ord = get_most_recent_order()
-    if not ord:
+    order = await get_most_recent_order(customer_of(ctx.userdata))
+    if not order:
+        return "You have no past orders yet."
+    if STREAM_LISTINGS:
+        return speak_listing(ctx, _order_lines(order))
+    return "\n".join(_order_lines(order))
+
+
+@function_tool
+@timed_tool
+async def order_history(
+    ctx: RunContext[Userdata],
+    count: Annotated[int, Field(description="How many recent orders", default=3)] = 3,
+) -> str:
+    """The customer's most recent orders, newest first."""
+    orders = await get_recent_orders(max(1, min(int(count), 10)), customer_of(ctx.userdata))
+    if not orders:
         return "You have no past orders yet."
-    lines = [f"Most recent order: {ord['id']} — {ord['created_at']}"]
-    for it in ord['items']:
-        lines.append(f"- {it['name']} x {it['quantity']}: {it['line_total']} {ord['currency']}")
-    lines.append(f"Total: {ord['total']} {ord['currency']}")
+    lines = [f"Your last {len(orders)} orders:"]
+    for order in orders:
+        items = ", ".join(f"{it.name} x {it.quantity}" for it in order.lines)
+        lines.append(f"- {order.id}: {items} — {order.total} {order.currency}")
+    if STREAM_LISTINGS:
+        return speak_listing(ctx, lines)
     return "\n".join(lines)
 
+
+@function_tool
+@timed_tool
+async def spending_summary(
+    ctx: RunContext[Userdata],
+) -> str:
+    """How many orders the customer has placed and how much they have spent."""
+    stats = await asyncio.to_thread(order_index.customer_stats, customer_of(ctx.userdata))
+    if not stats["orders"]:
+        return "You haven't placed any orders yet."
+    plural = "s" if stats["orders"] != 1 else ""
+    return (
+        f"You've placed {stats['orders']} order{plural} and spent {stats['total_spent']} INR in total, "
+        f"about {round(stats['average_order_value'])} INR per order."
+    )
+
+
+def _order_lines(order: Order) -> Iterator[str]:
+    yield f"Most recent order: {order.id} — {order.created_at}"
+    for it in order.lines:
+        yield f"- {it.name} x {it.quantity}: {it.line_total} {order.currency}"
+    yield f"Total: {order.total} {order.currency}"
+
+
+async def stream_lines(lines: Iterable[str]) -> AsyncIterator[str]:
+    """Yield a listing one line at a time so TTS can start on the first line."""
+    for line in lines:
+        yield line + "\n"
+        await asyncio.sleep(0)  # hand each chunk to the speech pipeline before the next
+
+
+LISTING_SPOKEN = "The list is being read out to the customer right now. Don't repeat it; just ask what they'd like to do next."
+
+
+def speak_listing(ctx: RunContext[Userdata], lines: Iterable[str]) -> str:
+    """Stream a listing to the room and tell the LLM it has already been spoken."""
+    ctx.session.say(stream_lines(lines), add_to_chat_ctx=True)
+    return LISTING_SPOKEN
+
+# -------------------------
+# Intent fast path (see intents.py)
+# -------------------------
+# Answer simple commands ("show my cart", "what was my last order") without the LLM
+INTENT_FAST_PATH = os.getenv("INTENT_FAST_PATH", "1") == "1"
+
+FAST_PATH_TOOLS = {
+    intents.Intent.SHOW_CART: show_cart,
+    intents.Intent.CLEAR_CART: clear_cart,
+    intents.Intent.LAST_ORDER: last_order,
+    intents.Intent.ORDER_HISTORY: order_history,
+    intents.Intent.SPENDING_SUMMARY: spending_summary,
+}
+
+
+@dataclass
+class FastPathContext:
+    """What the tools use of RunContext, for calling them outside an LLM tool call."""
+    userdata: Userdata
+    session: AgentSession
+
 # -------------------------
 # The Agent (Aria)
 # -------------------------
+GREETING = "Hi, I'm Aria from StyleHub Store. Looking for a mug, a hoodie or a tee today?"
+
 class GameMasterAgent(Agent):
     def __init__(self):
         # System instructions now describe the shopkeeper persona and commerce role
@@ -570,25 +655,70 @@ class GameMasterAgent(Agent):
         Role: Help the customer browse the catalog, add items to cart, place orders, and review recent orders.
 
         Rules:
-            - Use the provided tools to show the catalog, add items to cart, show the cart, place orders, show last order and clear the cart.
+            - Use the provided tools to show the catalog, add items to cart, show the cart, remove items or change their quantity, place orders, show last order, show order history, summarize spending and clear the cart.
             - Keep continuity using the per-session userdata. Mention cart contents if relevant.
             - Drive short voice-first turns suitable for spoken delivery.
             - When presenting options, include product id and price (e.g. 'mug-001 — 299 INR').
         """
         super().__init__(
             instructions=instructions,
-            tools=[show_catalog, add_to_cart, show_cart, clear_cart, place_order, last_order],
+            tools=[
+                show_catalog, add_to_cart, show_cart, remove_from_cart, update_cart_quantity,
+                clear_cart, place_order,
+                last_order, order_history, spending_summary,
+            ],
         )
 
+    async def on_user_turn_completed(self, turn_ctx: ChatContext, new_message: ChatMessage) -> None:
+        """Answer fast-path commands directly; everything else goes on to the LLM."""
+        if not INTENT_FAST_PATH:
+            return
+        t0 = time.perf_counter()
+        userdata: Userdata = self.session.userdata
+        labels = metric_labels(userdata)
+        text = new_message.text_content or ""
+        intent = intents.match(text)
+        if intent is None:
+            latency.RECORDER.observe("voice_intent_route_seconds", time.perf_counter() - t0, route="llm", intent="", **labels)
+            return
+        try:
+            reply = await FAST_PATH_TOOLS[intent](FastPathContext(userdata, self.session))
+        except Exception:
+            logger.exception("fast path %s failed; handing the turn to the LLM", intent.value)
+            return
+        # keep the exchange in the LLM's context so follow-ups ("remove the second one") work
+        chat_ctx = self.chat_ctx.copy()
+        chat_ctx.add_message(role="user", content=text)
+        await self.update_chat_ctx(chat_ctx)
+        if reply != LISTING_SPOKEN:  # a streamed listing is already being spoken
+            self.session.say(reply, add_to_chat_ctx=True)
+        handled = time.perf_counter() - t0
+        latency.RECORDER.observe("voice_intent_route_seconds", handled, route="fast_path", intent=intent.value, **labels)
+        if userdata.llm_ttft is not None:
+            # skipped: the LLM choosing the tool, then phrasing its result
+            saved = max(0.0, 2 * userdata.llm_ttft - handled)
+            latency.RECORDER.observe("voice_fast_path_saved_seconds", saved, intent=intent.value, **labels)
+        logger.info("fast path %s answered in %.1f ms", intent.value, handled * 1000)
+        raise StopResponse()
+
+    async def on_enter(self):
+        # fixed text straight to TTS: the greeting doesn't wait for an LLM round trip
+        self.session.say(GREETING, add_to_chat_ctx=True)
+        userdata: Userdata = self.session.userdata
+        logger.info("greeting queued %.0f ms after job start", (time.perf_counter() - userdata.job_started) * 1000)
+
 # -------------------------
 # Entrypoint & Prewarm (keeps speech functionality untouched)
 # -------------------------
 def prewarm(proc: JobProcess):
+    # runs on the job process's main thread before its first room: plugins register here
+    plugins()
     # load VAD model and stash on process userdata, try/catch like original file
     try:
-        proc.userdata["vad"] = silero.VAD.load()
+        proc.userdata["vad"] = plugins().silero.VAD.load()
     except Exception:
         logger.warning("VAD prewarm failed; continuing without preloaded VAD.")
+    proc.userdata["catalog_index"] = get_catalog_index()
 
 
 async def entrypoint(ctx: JobContext):
@@ -596,29 +726,91 @@ async def entrypoint(ctx: JobContext):
     logger.info("\n" + "🛍️" * 6)
     logger.info("🚀 STARTING VOICE E-COMMERCE AGENT (StyleHub Store) — Aria")
 
-    userdata = Userdata()
+    userdata = Userdata(room=ctx.room.name)
+    p = plugins()
 
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3"),
-        llm=google.LLM(model="gemini-2.5-flash"),
-        tts=murf.TTS(
+        stt=p.deepgram.STT(model="nova-3"),
+        llm=p.google.LLM(model="gemini-2.5-flash"),
+        tts=p.murf.TTS(
             voice="en-US-marcus",
             style="Conversational",
             text_pacing=True,
         ),
-        turn_detection=MultilingualModel(),
+        turn_detection=p.MultilingualModel(),
         vad=ctx.proc.userdata.get("vad"),
         userdata=userdata,
     )
 
+    # registered before start so the greeting's TTS metrics are counted too
+    @session.on("metrics_collected")
+    def _on_metrics_collected(ev: MetricsCollectedEvent):
+        record_pipeline_metrics(userdata, ev.metrics)
+
     await session.start(
         agent=GameMasterAgent(),
         room=ctx.room,
-        room_input_options=RoomInputOptions(noise_cancellation=noise_cancellation.BVC()),
+        room_input_options=RoomInputOptions(noise_cancellation=p.noise_cancellation.BVC()),
     )
 
+    async def write_metrics():
+        try:
+            await asyncio.to_thread(latency.RECORDER.flush)
+        except OSError as e:
+            logger.warning("Could not write latency metrics: %s", e)
+
+    async def flush_metrics_periodically():
+        while True:
+            await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+            await write_metrics()
+
+    metrics_flusher = asyncio.create_task(flush_metrics_periodically())
+
+    async def flush_metrics():
+        metrics_flusher.cancel()
+        latency.RECORDER.end_session(userdata.session_id)
+        await write_metrics()
+
+    ctx.add_shutdown_callback(flush_metrics)
+
+    async def write_trace():
+        try:
+            path = await userdata.history.close()
+        except OSError as e:
+            logger.warning("Could not write session trace: %s", e)
+            return
+        if path:
+            logger.info("session trace (%d actions): %s", userdata.history.recorded, path)
+
+    ctx.add_shutdown_callback(write_trace)
+
+    async def log_cache_stats():
+        logger.info("catalog render cache: %s", catalog_render_cache.stats())
+
+    ctx.add_shutdown_callback(log_cache_stats)
+
+    async def flush_orders():
+        await order_writer.aclose()
+        logger.info("order writer: %s", order_writer.stats())
+
+    ctx.add_shutdown_callback(flush_orders)
+
+    # pick up catalog.jsonl edits (prices, new products) without restarting the job
+    catalog_watcher = asyncio.create_task(catalog.watch())
+
+    async def stop_catalog_watcher():
+        catalog_watcher.cancel()
+
+    ctx.add_shutdown_callback(stop_catalog_watcher)
+
     await ctx.connect()
 
+    # file this shopper's orders under their participant identity
+    participant = await ctx.wait_for_participant()
+    userdata.customer_id = participant.identity
+    userdata.player_name = userdata.player_name or participant.name or None
+
 
 if __name__ == "__main__":
+    plugins()  # register plugins in the worker process (model downloads, inference runners)
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
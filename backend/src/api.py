@@ -0,0 +1,253 @@
+# HTTP API - ACP-inspired catalog and order endpoints for the web UI
+#
+# Runs next to the agent and shares its order journal, so orders placed by voice
+# show up here (and in the frontend's order history) without a restart.
+#
+#   cd backend/src
+#   python api.py            # http://localhost:8000
+import asyncio
+import base64
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+import catalog
+import latency
+import orders
+from catalog_payloads import CatalogPayloads, parse_fields
+from feed import FeedHub, sse_frame
+
+# How often the journal is checked for orders placed by the agent while dashboards
+# are subscribed to the feed (seconds)
+FEED_POLL_INTERVAL = float(os.getenv("FEED_POLL_INTERVAL", "0.2"))
+
+hub = FeedHub()
+
+# /acp/catalog bodies, serialized and compressed once per query and catalog version
+catalog_payloads = CatalogPayloads()
+
+
+def _publish_orders(new_orders):
+    for order in new_orders:
+        hub.publish("order", order.to_dict())
+    hub.publish("stats", orders.STATS.snapshot())
+
+
+orders.add_listener(_publish_orders)
+
+
+async def _watch_journal():
+    # orders placed here reach the hub directly; the agent's arrive through the journal
+    while True:
+        await asyncio.sleep(FEED_POLL_INTERVAL)
+        if len(hub):
+            await asyncio.to_thread(orders.refresh)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    hub.bind(asyncio.get_running_loop())
+    await asyncio.to_thread(orders.refresh)  # read the journal now, not on the first request
+    await asyncio.to_thread(catalog_payloads.warm)
+    watchers = [asyncio.create_task(_watch_journal()), asyncio.create_task(catalog.watch())]
+    yield
+    for watcher in watchers:
+        watcher.cancel()
+
+
+app = FastAPI(title="StyleHub Store API", lifespan=lifespan)
+
+# the Next.js dev server runs on another port
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["ETag", "Content-Encoding"],
+)
+
+NDJSON = "application/x-ndjson"
+MAX_PAGE = 500
+MAX_QUANTITY = 100  # per line item
+
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 if the client already has this version (If-None-Match), else None."""
+    sent = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in sent.split(",")) or sent.strip() == "*":
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def _encode_cursor(order) -> str:
+    key = json.dumps(orders.order_key(order), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(key).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, order_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return (str(created_at), str(order_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+class LineItemIn(BaseModel):
+    product_id: str
+    quantity: int = Field(1, ge=1, le=MAX_QUANTITY)
+    size: Optional[str] = None
+
+
+class OrderIn(BaseModel):
+    line_items: list[LineItemIn]
+    buyer: Optional[dict[str, str]] = None
+
+
+@app.get("/acp/catalog")
+def list_catalog(
+    request: Request,
+    category: Optional[str] = None,
+    max_price: Optional[int] = None,
+    min_price: Optional[int] = None,
+    color: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="comma-separated projection, e.g. id,name,price,image_url"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE),
+):
+    """Products matching the filters; page with offset/limit (next_offset), project with fields.
+
+    Bodies are prebuilt per query and catalog version and served gzip/brotli
+    compressed as the client accepts, with a strong ETag for If-None-Match.
+    """
+    try:
+        projection = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    filters = {"category": category, "max_price": max_price, "min_price": min_price, "color": color}
+    payload = catalog_payloads.get(filters, projection, offset, limit)
+    encoding = payload.encoding_for(request.headers.get("accept-encoding", ""))
+    body, etag = payload.variant(encoding)
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    cached = _not_modified(request, etag)
+    if cached is not None:
+        cached.headers.update(headers)
+        return cached
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.post("/acp/orders", status_code=201)
+def create_order(body: OrderIn):
+    products = [catalog.get_product_by_id(item.product_id) for item in body.line_items]
+    unknown = [item.product_id for item, product in zip(body.line_items, products) if product is None]
+    if unknown or not body.line_items:
+        raise HTTPException(status_code=400, detail=f"Unknown products: {unknown}" if unknown else "No line_items")
+    items = []
+    for item, product in zip(body.line_items, products):
+        if item.size is not None:
+            # stored as the catalog spells it ('m' -> 'M')
+            size = next((s for s in product.sizes if s.upper() == item.size.strip().upper()), None)
+            if size is None:
+                sizes = f"one of {list(product.sizes)}" if product.sizes else "no size"
+                raise HTTPException(status_code=400, detail=f"{product.id} comes in {sizes}, not {item.size!r}")
+            item = item.model_copy(update={"size": size})
+        items.append(item.model_dump(exclude_none=True))
+    return orders.create_order(items, body.buyer).to_dict()
+
+
+@app.get("/acp/orders")
+def list_orders(
+    request: Request,
+    limit: int = Query(50, ge=1, le=MAX_PAGE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    since: Optional[str] = Query(None, description="ISO date/time, inclusive"),
+    until: Optional[str] = Query(None, description="ISO date/time, exclusive"),
+    customer: Optional[str] = Query(None, description="buyer id or name"),
+    fmt: Optional[str] = Query(None, alias="format", description="'ndjson' to stream every match, one order per line"),
+):
+    """Orders newest first, one page at a time (keyset pagination on created_at, id).
+
+    Responses carry an ETag of the store version (and format); send it back as If-None-Match
+    and an unchanged store answers 304 with no body.
+    """
+    streaming = fmt == "ndjson" or NDJSON in request.headers.get("accept", "")
+    # the JSON page and the NDJSON stream are different bodies: tag them apart
+    etag = f'"{orders.store_version()}{"-ndjson" if streaming else ""}"'
+    headers = {"ETag": etag, "Vary": "Accept"}
+    cached = _not_modified(request, etag)
+    if cached is not None:
+        cached.headers.update(headers)
+        return cached
+    before = _decode_cursor(cursor) if cursor else None
+    page, has_more = orders.list_orders(
+        None if streaming else limit, before=before, since=since, until=until, customer=customer
+    )
+    if streaming:
+        # serialized one order at a time as the client reads, never as one big body
+        lines = (json.dumps(o.to_dict(), separators=(",", ":")) + "\n" for o in page)
+        return StreamingResponse(lines, media_type=NDJSON, headers=headers)
+    return Response(
+        content=json.dumps({
+            "orders": [o.to_dict() for o in page],
+            "next_cursor": _encode_cursor(page[-1]) if has_more else None,
+            "has_more": has_more,
+        }),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+@app.get("/acp/orders/events")
+async def order_events(request: Request):
+    """Server-sent events: the current stats on connect, then an "order" event for each
+    new order and a "stats" event after each batch. Reconnects resume from Last-Event-ID."""
+    try:
+        last_event_id = int(request.headers.get("last-event-id", ""))
+    except ValueError:
+        last_event_id = None
+    # the client only subscribes once the response starts; replay anything published
+    # from here on (get_stats may itself publish new orders) so nothing falls in between
+    greeting_id = hub.last_id()
+    greeting = sse_frame(greeting_id, "stats", await asyncio.to_thread(orders.get_stats))
+    return StreamingResponse(
+        hub.subscribe(last_event_id if last_event_id is not None else greeting_id, greeting),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/acp/orders/{order_id}")
+def get_order(order_id: str):
+    order = orders.get_order_by_id(order_id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order.to_dict()
+
+
+@app.get("/acp/stats")
+def get_stats(request: Request, response: Response):
+    """Counters are maintained as orders are committed; reading them is constant time."""
+    etag = f'"{orders.store_version()}"'
+    cached = _not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers["ETag"] = etag
+    return orders.get_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text: voice pipeline and tool latency histograms from every agent job process."""
+    return PlainTextResponse(latency.collect(), media_type="text/plain; version=0.0.4")
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,91 @@
+# Versioned LRU/TTL cache with hit/miss accounting
+#
+# Used to memoize rendered tool responses and other values derived purely from
+# the catalog. Every entry is stamped with the catalog version it was computed
+# from; a lookup under a newer version drops the whole cache, so a product or
+# price change can never serve a stale answer.
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Callable, Optional
+
+
+class TTLCache:
+    def __init__(self, name: str, maxsize: int = 256, ttl: float = 600.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._miss_seconds = 0.0  # total time spent computing misses
+
+    def _check_version(self, version: int) -> None:
+        if version != self._version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._version = version
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        with self._lock:
+            self._check_version(version)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, version: int, compute: Callable[[], Any]) -> Any:
+        value = self.get(key, version)
+        if value is not None:
+            return value
+        t0 = time.perf_counter()
+        value = compute()
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.misses += 1
+            self._miss_seconds += elapsed
+        self.put(key, version, value)
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        avg_miss_ms = self._miss_seconds * 1000 / self.misses if self.misses else 0.0
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "avg_miss_ms": round(avg_miss_ms, 3),
+            # every hit skipped roughly one average miss worth of work
+            "est_saved_ms": round(self.hits * avg_miss_ms, 1),
+        }
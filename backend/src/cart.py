@@ -0,0 +1,126 @@
+# Shopping Cart - one line per product and attributes, total kept as it changes
+#
+# Adding a product that is already in the cart with the same attributes (size)
+# adds to that line's quantity instead of appending a duplicate. A line is
+# priced once, from the Product it was added with, and the cart total is
+# adjusted on every add, update and remove, so reading the cart never touches
+# the catalog and checkout hands over lines that are already priced. Only if
+# the catalog was reloaded since a line was priced does checkout re-price, once,
+# against the new version.
+from collections.abc import Iterator
+from typing import Optional
+
+from catalog_index import CatalogIndex
+from models import OrderLine, Product, _intern
+
+# (product_id, size); sizes are normalized so 'm' and 'M' are the same line
+LineKey = tuple[str, Optional[str]]
+
+
+def _normalize_size(size: Optional[str]) -> Optional[str]:
+    size = (size or "").strip().upper()
+    return _intern(size) if size else None
+
+
+class Cart:
+    def __init__(self, currency: str = "INR"):
+        self.currency = currency
+        self.total = 0
+        self._lines: dict[LineKey, OrderLine] = {}  # in the order first added
+        self._priced_at: Optional[int] = None  # catalog version the prices came from
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __iter__(self) -> Iterator[OrderLine]:
+        return iter(self._lines.values())
+
+    @property
+    def item_count(self) -> int:
+        return sum(line.quantity for line in self._lines.values())
+
+    # -------------------------
+    # Mutations (each keeps ``total`` current)
+    # -------------------------
+    def add(self, product: Product, quantity: int = 1, size: Optional[str] = None,
+            catalog_version: Optional[int] = None) -> OrderLine:
+        """Add ``quantity`` of a product, merging with its line for the same size."""
+        if quantity < 1:
+            raise ValueError("quantity must be at least 1")
+        key = (product.id, _normalize_size(size))
+        line = self._lines.get(key)
+        if line is None:
+            line = self._lines[key] = OrderLine(product.id, product.name, product.price, 0, key[1])
+        line.quantity += quantity
+        self.total += line.unit_price * quantity
+        if catalog_version is not None:
+            self._priced_at = catalog_version if self._priced_at is None else min(self._priced_at, catalog_version)
+        return line
+
+    def update_quantity(self, line: OrderLine, quantity: int) -> None:
+        """Set a line's quantity; 0 removes it."""
+        if quantity < 0:
+            raise ValueError("quantity can't be negative")
+        if quantity == 0:
+            self.remove(line)
+            return
+        self.total += line.unit_price * (quantity - line.quantity)
+        line.quantity = quantity
+
+    def remove(self, line: OrderLine) -> None:
+        if self._lines.pop((line.product_id, line.size), None) is line:
+            self.total -= line.line_total
+
+    def clear(self) -> None:
+        self._lines.clear()
+        self.total = 0
+        self._priced_at = None
+
+    # -------------------------
+    # Lookup
+    # -------------------------
+    def line_at(self, position: int) -> Optional[OrderLine]:
+        """Line by position as read out (0-based; negative counts from the end)."""
+        lines = list(self._lines.values())
+        try:
+            return lines[position]
+        except IndexError:
+            return None
+
+    def lines_for(self, product_id: str, size: Optional[str] = None) -> list[OrderLine]:
+        """The product's lines (one per size), or just the one in ``size``."""
+        if size:
+            line = self._lines.get((product_id, _normalize_size(size)))
+            return [line] if line else []
+        return [line for (pid, _), line in self._lines.items() if pid == product_id]
+
+    def product_ids(self) -> list[str]:
+        return list(dict.fromkeys(pid for pid, _ in self._lines))
+
+    # -------------------------
+    # Checkout
+    # -------------------------
+    def reprice(self, index: CatalogIndex) -> list[OrderLine]:
+        """Bring prices up to ``index`` if the catalog changed since they were taken.
+
+        Lines whose product is gone are removed and returned.
+        """
+        if self._priced_at is None or self._priced_at == index.version:
+            return []
+        removed = []
+        for key, line in list(self._lines.items()):
+            product = index.get(line.product_id)
+            if product is None:
+                removed.append(self._lines.pop(key))
+                continue
+            line.name, line.unit_price = product.name, product.price
+        self.total = sum(line.line_total for line in self._lines.values())
+        self._priced_at = index.version
+        return removed
+
+    def to_order_lines(self) -> tuple[OrderLine, ...]:
+        """Snapshot of the lines for an order (the cart keeps its own, mutable ones)."""
+        return tuple(
+            OrderLine(line.product_id, line.name, line.unit_price, line.quantity, line.size)
+            for line in self._lines.values()
+        )
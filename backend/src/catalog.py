@@ -1,154 +1,67 @@
 # Product Catalog - ACP-inspired structure
-# You can modify prices, add more products here
-
-PRODUCTS = [
-    {
-        "id": "mug-001",
-        "name": "Ceramic Coffee Mug - White",
-        "description": "Classic white ceramic mug, 350ml capacity",
-        "price": 299,
-        "currency": "INR",
-        "category": "mug",
-        "attributes": {
-            "color": "white",
-            "material": "ceramic",
-            "capacity": "350ml"
-        },
-        "in_stock": True
-    },
-    {
-        "id": "mug-002",
-        "name": "Ceramic Coffee Mug - Black",
-        "description": "Elegant black ceramic mug, 350ml capacity",
-        "price": 299,
-        "currency": "INR",
-        "category": "mug",
-        "attributes": {
-            "color": "black",
-            "material": "ceramic",
-            "capacity": "350ml"
-        },
-        "in_stock": True
-    },
-    {
-        "id": "mug-003",
-        "name": "Travel Mug - Stainless Steel",
-        "description": "Insulated travel mug, keeps drinks hot for 6 hours",
-        "price": 599,
-        "currency": "INR",
-        "category": "mug",
-        "attributes": {
-            "color": "silver",
-            "material": "stainless steel",
-            "capacity": "500ml",
-            "insulated": True
-        },
-        "in_stock": True
-    },
-    {
-        "id": "hoodie-001",
-        "name": "Cotton Hoodie - Black",
-        "description": "Comfortable cotton hoodie with front pocket",
-        "price": 1299,
-        "currency": "INR",
-        "category": "hoodie",
-        "attributes": {
-            "color": "black",
-            "material": "cotton",
-            "sizes": ["S", "M", "L", "XL"]
-        },
-        "in_stock": True
-    },
-    {
-        "id": "hoodie-002",
-        "name": "Cotton Hoodie - Navy Blue",
-        "description": "Premium navy blue hoodie with zipper",
-        "price": 1499,
-        "currency": "INR",
-        "category": "hoodie",
-        "attributes": {
-            "color": "navy blue",
-            "material": "cotton",
-            "sizes": ["S", "M", "L", "XL"],
-            "zipper": True
-        },
-        "in_stock": True
-    },
-    {
-        "id": "hoodie-003",
-        "name": "Fleece Hoodie - Grey",
-        "description": "Warm fleece hoodie perfect for winter",
-        "price": 1799,
-        "currency": "INR",
-        "category": "hoodie",
-        "attributes": {
-            "color": "grey",
-            "material": "fleece",
-            "sizes": ["M", "L", "XL", "XXL"]
-        },
-        "in_stock": True
-    },
-    {
-        "id": "tshirt-001",
-        "name": "Cotton T-Shirt - White",
-        "description": "Basic white cotton t-shirt",
-        "price": 399,
-        "currency": "INR",
-        "category": "tshirt",
-        "attributes": {
-            "color": "white",
-            "material": "cotton",
-            "sizes": ["S", "M", "L", "XL"]
-        },
-        "in_stock": True
-    },
-    {
-        "id": "tshirt-002",
-        "name": "Cotton T-Shirt - Black",
-        "description": "Classic black cotton t-shirt",
-        "price": 399,
-        "currency": "INR",
-        "category": "tshirt",
-        "attributes": {
-            "color": "black",
-            "material": "cotton",
-            "sizes": ["S", "M", "L", "XL"]
-        },
-        "in_stock": True
-    },
-    {
-        "id": "tshirt-003",
-        "name": "Graphic T-Shirt - Blue",
-        "description": "Cool graphic print t-shirt",
-        "price": 599,
-        "currency": "INR",
-        "category": "tshirt",
-        "attributes": {
-            "color": "blue",
-            "material": "cotton blend",
-            "sizes": ["M", "L", "XL"],
-            "graphic": True
-        },
-        "in_stock": True
-    },
-    {
-        "id": "cap-001",
-        "name": "Baseball Cap - Black",
-        "description": "Adjustable baseball cap",
-        "price": 349,
-        "currency": "INR",
-        "category": "cap",
-        "attributes": {
-            "color": "black",
-            "material": "cotton",
-            "adjustable": True
-        },
-        "in_stock": True
-    }
-]
-
-
-def list_products(filters: dict | None = None) -> list[dict]:
+# Products live in catalog.jsonl (one product per line); edit prices or add products
+# there. Running processes pick up changes without a restart.
+
+import asyncio
+import logging
+import os
+import threading
+from pathlib import Path
+
+from catalog_index import CatalogIndex
+from catalog_source import CatalogSource
+from models import Product
+
+logger = logging.getLogger("voice_game_master")
+
+CATALOG_FILE = Path(os.getenv("CATALOG_FILE", Path(__file__).parent / "catalog.jsonl"))
+
+# How often running processes check the catalog file for changes (seconds)
+RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", "5"))
+
+_source = CatalogSource(CATALOG_FILE)
+_swap_lock = threading.Lock()
+
+INDEX = CatalogIndex(_source.load(), digest=_source.digest)
+PRODUCTS = INDEX.products
+
+
+def get_index() -> CatalogIndex:
+    """The current catalog index; callers should fetch it once per request"""
+    return INDEX
+
+
+def swap_index(index: CatalogIndex):
+    """Atomically replace the current catalog index"""
+    global INDEX, PRODUCTS
+    with _swap_lock:
+        INDEX, PRODUCTS = index, index.products
+
+
+def reload_if_changed() -> bool:
+    """Rebuild the index if catalog.jsonl changed; keeps the old one if the new file is bad"""
+    if not _source.changed():
+        return False
+    try:
+        index = CatalogIndex(_source.load(), digest=_source.digest)
+    except Exception as e:
+        logger.warning("Catalog reload failed, keeping current catalog: %s", e)
+        _source.mark_seen()  # don't retry until the file changes again
+        return False
+    swap_index(index)
+    logger.info("Catalog reloaded: %d products (version %d)", len(index), index.version)
+    return True
+
+
+async def watch(interval: float = RELOAD_INTERVAL):
+    """Poll the catalog file and hot-swap the index; the rebuild runs off the event loop"""
+    while True:
+        await asyncio.sleep(interval)
+        if _source.changed():
+            await asyncio.to_thread(reload_if_changed)
+
+
+def list_products(filters: dict | None = None, index: CatalogIndex | None = None) -> list[Product]:
     """
     List products with optional filtering
     
@@ -157,43 +70,37 @@ def list_products(filters: dict | None = None) -> list[dict]:
     - max_price: int (maximum price in INR)
     - color: str (e.g., "black", "white")
     - min_price: int (minimum price in INR)
+    
+    index: a specific catalog version (defaults to the current one)
     """
+    if index is None:
+        index = get_index()
     if not filters:
-        return PRODUCTS
+        return index.products
     
-    filtered = PRODUCTS.copy()
+    postings = []
     
     if "category" in filters:
-        filtered = [p for p in filtered if p["category"].lower() == filters["category"].lower()]
-    
-    if "max_price" in filters:
-        filtered = [p for p in filtered if p["price"] <= filters["max_price"]]
+        postings.append(index.category(filters["category"]))
     
-    if "min_price" in filters:
-        filtered = [p for p in filtered if p["price"] >= filters["min_price"]]
+    if "max_price" in filters or "min_price" in filters:
+        postings.append(index.price_range(filters.get("min_price"), filters.get("max_price")))
     
     if "color" in filters:
-        filtered = [
-            p for p in filtered 
-            if "color" in p["attributes"] and 
-            filters["color"].lower() in p["attributes"]["color"].lower()
-        ]
+        postings.append(index.color(filters["color"], partial=True))
     
-    return filtered
+    return index.select(*postings)
 
 
-def get_product_by_id(product_id: str) -> dict | None:
+def get_product_by_id(product_id: str) -> Product | None:
     """Get a single product by ID"""
-    for product in PRODUCTS:
-        if product["id"] == product_id:
-            return product
-    return None
+    return get_index().get(product_id)
 
 
-def get_product_by_name(name: str) -> dict | None:
+def get_product_by_name(name: str) -> Product | None:
     """Find product by partial name match"""
     name_lower = name.lower()
-    for product in PRODUCTS:
-        if name_lower in product["name"].lower():
+    for product in get_index().products:
+        if name_lower in product.name.lower():
             return product
     return None
@@ -0,0 +1,112 @@
+# Catalog Index - O(1) id lookup and inverted attribute indexes
+#
+# Built once per process (at worker prewarm for the agent) from a product list.
+# Each attribute maps a normalized value to a posting list (set of catalog
+# positions); filters intersect the posting lists smallest-first instead of
+# scanning every product. Prices are kept in a sorted array for bisect range
+# queries. Products are ``models.Product`` records. Free-text queries
+# go through the BM25 index in ``text`` (see search.py); spoken product
+# references go through ``resolver`` (see resolver.py).
+import itertools
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from typing import Optional
+
+from models import Product
+from resolver import ProductResolver
+from search import SearchIndex
+
+# every index build gets a new version; caches of catalog-derived values key on it
+_versions = itertools.count(1)
+
+
+class CatalogIndex:
+    def __init__(self, products: Iterable[Product], digest: Optional[str] = None):
+        self.version = next(_versions)
+        # content hash of the catalog file; unlike version it is the same in every process
+        self.digest = digest
+        self.products: list[Product] = list(products)
+        self.by_id: dict[str, Product] = {}
+        self._category: dict[str, set[int]] = {}
+        self._color: dict[str, set[int]] = {}
+        self._size: dict[str, set[int]] = {}
+        self._no_color: set[int] = set()
+
+        priced = []
+        for pos, p in enumerate(self.products):
+            self.by_id[p.id] = p
+            self._category.setdefault(p.category, set()).add(pos)
+            if p.color:
+                self._color.setdefault(p.color, set()).add(pos)
+            else:
+                self._no_color.add(pos)
+            for size in p.sizes:
+                self._size.setdefault(size.upper(), set()).add(pos)
+            priced.append((p.price, pos))
+        priced.sort()
+        self._price_keys = [price for price, _ in priced]
+        self._price_pos = [pos for _, pos in priced]
+        self.text = SearchIndex(self.products)
+        self.resolver = ProductResolver(self.products)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def get(self, product_id: str) -> Optional[Product]:
+        return self.by_id.get(product_id)
+
+    # -------------------------
+    # Posting lists
+    # -------------------------
+    def category(self, category: str, partial: bool = False) -> set[int]:
+        """Products in ``category``; with ``partial``, also categories that
+        contain or are contained in it (e.g. 'hoodies' -> 'hoodie')."""
+        cat = category.lower()
+        if not partial or cat in self._category:
+            return self._category.get(cat, set())
+        hits = set()
+        for key, posting in self._category.items():
+            if key and (cat in key or key in cat):
+                hits |= posting
+        return hits
+
+    def color(self, color: str, partial: bool = False, include_missing: bool = False) -> set[int]:
+        """Products of ``color``; ``partial`` matches substrings ('blue' ->
+        'navy blue'), ``include_missing`` keeps products with no color."""
+        col = color.lower()
+        if partial:
+            hits = set()
+            for key, posting in self._color.items():
+                if col in key:
+                    hits |= posting
+        else:
+            hits = set(self._color.get(col, ()))
+        if include_missing:
+            hits |= self._no_color
+        return hits
+
+    def size(self, size: str) -> set[int]:
+        return self._size.get(size.upper(), set())
+
+    def price_range(self, min_price: Optional[float] = None, max_price: Optional[float] = None) -> set[int]:
+        lo = 0 if min_price is None else bisect_left(self._price_keys, min_price)
+        hi = len(self._price_keys) if max_price is None else bisect_right(self._price_keys, max_price)
+        return set(self._price_pos[lo:hi])
+
+    def select(self, *postings: set[int]) -> list[Product]:
+        """Intersect posting lists (smallest first) and return products in catalog order."""
+        if not postings:
+            return list(self.products)
+        ordered = sorted(postings, key=len)
+        result = set(ordered[0])
+        for posting in ordered[1:]:
+            if not result:
+                break
+            result &= posting
+        return [self.products[pos] for pos in sorted(result)]
+
+    def search(self, query: str, k: Optional[int] = None, within: Optional[list[Product]] = None) -> list[Product]:
+        """Products ranked by BM25 relevance to ``query``, optionally restricted
+        to ``within`` (the result of a ``select``)."""
+        allowed = None if within is None else {p.id for p in within}
+        return [self.by_id[pid] for pid, _ in self.text.search(query, k=k, allowed=allowed)]
@@ -0,0 +1,132 @@
+# Catalog Payloads - pre-serialized, pre-compressed /acp/catalog responses
+#
+# The catalog only changes when catalog.jsonl is edited, so each distinct query
+# (filters, projected fields, page) is serialized and compressed once - gzip and,
+# when the brotli package is installed, brotli at maximum quality - and the same
+# bytes are served to every client until the catalog changes. Entries live in a
+# versioned cache (see cache.py) keyed on the catalog index version, so a reload
+# drops them all at once.
+#
+# ETags are strong and derived from the catalog's content hash plus the query,
+# so they are identical across API processes and restarts; each encoding gets
+# its own tag because the bytes differ.
+import gzip
+import hashlib
+import json
+from collections.abc import Sequence
+from typing import Optional
+
+import catalog
+from cache import TTLCache
+from catalog_index import CatalogIndex
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Fields a client may project; the grid needs only GRID_FIELDS
+FIELDS = ("id", "name", "description", "price", "currency", "category", "attributes", "in_stock", "image_url")
+GRID_FIELDS = ("id", "name", "price", "image_url")
+
+FILTERS = ("category", "min_price", "max_price", "color")
+
+
+class Payload:
+    """One response body in every encoding we serve."""
+
+    __slots__ = ("bodies", "etag")
+
+    def __init__(self, body: bytes, tag: str):
+        self.bodies: dict[str, bytes] = {"identity": body, "gzip": gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(body, quality=11)
+        self.etag = tag
+
+    def encoding_for(self, accept_encoding: str) -> str:
+        """Smallest encoding the client accepts (Accept-Encoding, honoring q=0)."""
+        accepted = set()
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.strip().partition(";")
+            q = params.strip().removeprefix("q=")
+            try:
+                weight = float(q) if q else 1.0
+            except ValueError:
+                weight = 0.0
+            if name and weight > 0:
+                accepted.add(name)
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def variant(self, encoding: str) -> tuple[bytes, str]:
+        """(body, strong ETag) for an encoding returned by ``encoding_for``."""
+        if encoding == "identity":
+            return self.bodies[encoding], f'"{self.etag}"'
+        return self.bodies[encoding], f'"{self.etag}-{encoding}"'
+
+
+def parse_fields(fields: Optional[str]) -> tuple[str, ...]:
+    """Comma-separated projection -> field tuple in canonical order; None means all fields."""
+    if not fields:
+        return FIELDS
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = wanted.difference(FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {sorted(unknown)}; choose from {', '.join(FIELDS)}")
+    return tuple(f for f in FIELDS if f in wanted)
+
+
+class CatalogPayloads:
+    def __init__(self, maxsize: int = 256):
+        # no TTL: entries are only ever invalidated by a catalog version change
+        self._cache = TTLCache("catalog_payloads", maxsize=maxsize, ttl=float("inf"))
+
+    def get(
+        self,
+        filters: Optional[dict] = None,
+        fields: Sequence[str] = FIELDS,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        index: Optional[CatalogIndex] = None,
+    ) -> Payload:
+        """The response for one catalog query, built on first request per catalog version."""
+        if index is None:
+            index = catalog.get_index()
+        filters = {k: filters[k] for k in FILTERS if filters and filters.get(k) is not None}
+        if isinstance(filters.get("category"), str):
+            filters["category"] = filters["category"].lower()
+        if isinstance(filters.get("color"), str):
+            filters["color"] = filters["color"].lower()
+        key = (tuple(filters.items()), tuple(fields), offset, limit)
+        return self._cache.get_or_compute(key, index.version, lambda: self._build(index, key))
+
+    def _build(self, index: CatalogIndex, key) -> Payload:
+        filters, fields, offset, limit = key
+        products = catalog.list_products(dict(filters), index=index)
+        end = len(products) if limit is None else min(len(products), offset + limit)
+        page = []
+        for product in products[offset:end]:
+            record = product.to_dict()
+            page.append({f: record[f] for f in fields if f in record})
+        body = json.dumps(
+            {
+                "products": page,
+                "total": len(products),
+                "next_offset": end if end < len(products) else None,
+                "catalog_version": index.digest or str(index.version),
+            },
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ).encode()
+        query = hashlib.blake2b(repr(key).encode(), digest_size=6).hexdigest()
+        return Payload(body, f"{index.digest or f'v{index.version}'}-{query}")
+
+    def warm(self) -> None:
+        """Build the responses every page load asks for (full catalog and the grid projection)."""
+        self.get()
+        self.get(fields=GRID_FIELDS)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
@@ -0,0 +1,79 @@
+# Catalog Source - products loaded from a JSONL file instead of code
+#
+# One product per line. The file is memory-mapped and parsed record by record,
+# so loading never materializes the whole file as one string and the pages are
+# shared through the OS page cache by every process that maps it. Both product
+# shapes that have existed in this repo are accepted (see models.Product).
+#
+# Edit the file by writing a new copy and renaming it over the old one; running
+# processes notice the change (see catalog.reload_if_changed) and swap in a new
+# index without restarting.
+import hashlib
+import json
+import logging
+import mmap
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Optional, Union
+
+from models import Product
+
+logger = logging.getLogger("voice_game_master")
+
+PathLike = Union[str, Path]
+
+
+def _digest(data) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+class CatalogSource:
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        self._stamp: Optional[tuple[int, int, int]] = None  # stamp of the last load
+        self.digest: Optional[str] = None  # content hash of the last load (stable across processes)
+        self._parsed_digest: Optional[str] = None
+
+    def stamp(self) -> Optional[tuple[int, int, int]]:
+        """(inode, size, mtime) of the file; changes on every edit or atomic replace."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def changed(self) -> bool:
+        return self.stamp() != self._stamp
+
+    def mark_seen(self) -> None:
+        """Treat the current file as loaded (e.g. after a failed reload)."""
+        self._stamp = self.stamp()
+
+    def iter_products(self) -> Iterator[Product]:
+        """Parse products one line at a time from a memory map of the file."""
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                self._parsed_digest = _digest(b"")
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # hashed from the same mapping that is parsed, so it matches the products
+                self._parsed_digest = _digest(mm)
+                lineno = 0
+                for line in iter(mm.readline, b""):
+                    lineno += 1
+                    if not line.strip():
+                        continue
+                    try:
+                        yield Product.from_dict(json.loads(line))
+                    except (ValueError, KeyError) as e:
+                        raise ValueError(f"{self.path}:{lineno}: bad product record: {e}") from e
+
+    def load(self) -> list[Product]:
+        """Load every product; remembers the file stamp for ``changed()`` and its ``digest``."""
+        stamp = self.stamp()
+        products = list(self.iter_products())
+        self._stamp = stamp
+        self.digest = self._parsed_digest
+        logger.info("Loaded %d products from %s", len(products), self.path)
+        return products
@@ -0,0 +1,125 @@
+# Order Feed - push new orders and stats to dashboards as they are committed
+#
+# One FeedHub per API process. Each change is encoded once as a server-sent
+# events frame and the same bytes are queued for every subscriber, so the cost
+# of a change grows with the number of clients only by a queue append. Slow
+# clients never hold up the others: a subscriber whose queue fills up is sent
+# a "reset" event (refetch everything) and disconnected. Recent frames are kept
+# so a client reconnecting with Last-Event-ID misses nothing; one that missed
+# more than those (or reconnects after an API restart) is sent a "reset" instead.
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any, Optional
+
+# Frames kept for Last-Event-ID replay
+REPLAY_SIZE = 256
+# Frames a subscriber may fall behind before it is dropped
+SUBSCRIBER_QUEUE = 256
+# Comment line sent on idle connections so proxies don't time them out
+HEARTBEAT_SECONDS = 15.0
+
+
+def sse_frame(event_id: int, event: str, data: Any) -> bytes:
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+
+class FeedHub:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: set[asyncio.Queue] = set()
+        self._recent: deque[tuple[int, bytes]] = deque(maxlen=REPLAY_SIZE)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Deliver on ``loop``; publish() may then be called from any thread."""
+        self._loop = loop
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    # -------------------------
+    # Publishing
+    # -------------------------
+    def publish(self, event: str, data: Any) -> None:
+        """Encode one event and queue it for every subscriber (thread-safe)."""
+        with self._lock:
+            event_id = next(self._ids)
+            frame = sse_frame(event_id, event, data)
+            self._recent.append((event_id, frame))
+            self.published += 1
+        if self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._fan_out(frame)
+        else:
+            self._loop.call_soon_threadsafe(self._fan_out, frame)
+
+    def _fan_out(self, frame: bytes) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # too far behind: tell it to refetch and stop feeding it
+                self._subscribers.discard(queue)
+                self.dropped += 1
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(sse_frame(0, "reset", {}))
+                queue.put_nowait(None)
+
+    # -------------------------
+    # Subscribing
+    # -------------------------
+    async def subscribe(
+        self, last_event_id: Optional[int] = None, greeting: Optional[bytes] = None
+    ) -> AsyncIterator[bytes]:
+        """SSE frames for one client until it disconnects; replays frames after ``last_event_id``,
+        or sends a "reset" if some of them are no longer kept."""
+        queue: asyncio.Queue = asyncio.Queue(SUBSCRIBER_QUEUE)
+        backlog = []
+        if last_event_id is not None:
+            with self._lock:
+                oldest = self._recent[0][0] if self._recent else 1
+                newest = self._recent[-1][0] if self._recent else 0
+                if last_event_id < oldest - 1 or last_event_id > newest:
+                    # fell out of the replay window, or an id from before a restart
+                    backlog = [sse_frame(0, "reset", {})]
+                else:
+                    backlog = [frame for event_id, frame in self._recent if event_id > last_event_id]
+        self._subscribers.add(queue)
+        try:
+            if greeting is not None:
+                yield greeting
+            for frame in backlog:
+                yield frame
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self._subscribers.discard(queue)
+
+    def last_id(self) -> int:
+        """Id of the newest published event (for greeting frames)."""
+        with self._lock:
+            return self._recent[-1][0] if self._recent else 0
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscribers), "published": self.published, "dropped": self.dropped}
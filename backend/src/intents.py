@@ -0,0 +1,86 @@
+# Intent Fast Path - answer simple commands without an LLM round trip
+#
+# "Show my cart", "clear the cart" and "what was my last order" always end in
+# the same tool call, yet each one waits for the LLM twice: once to choose the
+# tool and once to phrase its answer. The agent matches the final transcript
+# against the patterns below before the LLM runs; on a match it calls the tool
+# itself and speaks the result.
+#
+# Patterns match the whole utterance, after the transcript has been lowercased
+# and stripped of punctuation and politeness ("hey aria, can you please ...").
+# So anything with more in it ("clear the cart and add a mug", "don't clear my
+# cart", "show my cart total in dollars") falls through to the LLM. Commands
+# that change something are only listed when they can't be misread; checkout
+# is not on the fast path.
+import enum
+import re
+from typing import Optional
+
+
+class Intent(enum.Enum):
+    SHOW_CART = "show_cart"
+    CLEAR_CART = "clear_cart"
+    LAST_ORDER = "last_order"
+    ORDER_HISTORY = "order_history"
+    SPENDING_SUMMARY = "spending_summary"
+
+
+_CART = r"(?:my |the )?(?:shopping )?(?:cart|basket|bag)"
+
+GRAMMAR = {
+    Intent.SHOW_CART: [
+        rf"(?:show|read|tell|see|view|check|open)(?: me)? {_CART}(?: contents)?",
+        rf"(?:show|read|tell)(?: me)? what(?:s| is)? in {_CART}",
+        rf"what(?:s| is)? in {_CART}",
+        rf"what do i have in {_CART}",
+        rf"{_CART}",
+    ],
+    Intent.CLEAR_CART: [
+        rf"(?:clear|empty|reset)(?: out)? {_CART}",
+        rf"(?:remove|delete) everything (?:from|in) {_CART}",
+        r"start over with an empty cart",
+    ],
+    Intent.LAST_ORDER: [
+        r"(?:what was|what is|whats|show(?: me)?|tell me|read) my (?:last|latest|most recent|previous) order",
+        r"(?:my )?(?:last|latest|most recent) order",
+        r"what did i (?:last )?order(?: last time)?",
+    ],
+    Intent.ORDER_HISTORY: [
+        r"(?:show(?: me)?|read|tell me) my (?:order history|past orders|previous orders|recent orders|orders)",
+        r"(?:my )?order history",
+        r"what are my (?:past|previous|recent) orders",
+    ],
+    Intent.SPENDING_SUMMARY: [
+        r"how much (?:have i|did i|i have|i ve) spent(?: so far| in total| overall)?",
+        r"how much have i spent (?:so far|in total|overall|with you)",
+        r"(?:show(?: me)?|tell me|whats|what is) my (?:total )?spending(?: summary)?",
+    ],
+}
+
+# politeness and wake words around a command that don't change its meaning
+_PREFIX = re.compile(
+    r"^(?:(?:hey|hi|ok|okay|so|um|uh|aria|please|can you|could you|would you|will you|"
+    r"i want to|id like to|i would like to|let me|lets|go ahead and|now|and)\s+)+"
+)
+_SUFFIX = re.compile(r"(?:\s+(?:please|right now|now|for me|thanks|thank you|aria))+$")
+
+_COMPILED = [
+    (intent, re.compile(rf"(?:{'|'.join(patterns)})"))
+    for intent, patterns in GRAMMAR.items()
+]
+
+
+def normalize(transcript: str) -> str:
+    text = (transcript or "").lower().replace("'", "").replace("\u2019", "")
+    text = " ".join(re.findall(r"[a-z0-9]+", text))
+    text = _PREFIX.sub("", text)
+    return _SUFFIX.sub("", text)
+
+
+def match(transcript: str) -> Optional[Intent]:
+    """The command ``transcript`` is, if it is exactly one of the fast-path commands."""
+    text = normalize(transcript)
+    if not text:
+        return None
+    hits = {intent for intent, pattern in _COMPILED if pattern.fullmatch(text)}
+    return hits.pop() if len(hits) == 1 else None
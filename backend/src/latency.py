@@ -0,0 +1,165 @@
+# Latency Metrics - per-turn voice pipeline and tool latency histograms
+#
+# Each job process records, per session, how long each stage of a turn took:
+# end of speech -> final transcript (STT), LLM first token, TTS first audio,
+# end-of-utterance decision, every tool call, and how each turn was routed
+# (intent fast path or LLM). Observations go into fixed-bucket histograms (a few
+# counters per label set, no samples kept) and are written as Prometheus text to
+# METRICS_DIR every few seconds. Job
+# processes come and go, so nothing listens on a port per process; the HTTP
+# API serves the merged files at /metrics for Prometheus to scrape (or point a
+# node_exporter textfile collector at the directory).
+#
+# Every series carries the session_id (and room), so one slow session can be
+# told apart from a slow provider. Sessions are dropped a while after they end
+# to keep the number of series bounded.
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Optional
+
+METRICS_DIR = Path(os.getenv("METRICS_DIR", Path(tempfile.gettempdir()) / "stylehub-metrics"))
+# How long an ended session's series are still exported (seconds)
+SESSION_TTL = float(os.getenv("METRICS_SESSION_TTL", "3600"))
+
+# Upper bounds in seconds; voice turns live between ~100 ms and a few seconds
+BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0)
+
+FAMILIES = {
+    "voice_turn_stage_seconds": "Per-turn voice pipeline latency by stage (stt_final, llm_first_token, tts_first_audio, end_of_utterance)",
+    "voice_tool_seconds": "Tool execution time by tool and outcome",
+    "voice_intent_route_seconds": "Time to route a final transcript, by route (fast_path: answered without the LLM, llm) and intent; counts give the fast-path hit rate",
+    "voice_fast_path_saved_seconds": "Estimated LLM time skipped per fast-path turn (two LLM first-token latencies minus the fast path's own time), by intent",
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, le: Optional[str] = None) -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if le is not None:
+        parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Histogram:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)  # per bucket, not cumulative
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def render(self, family: str, labels: Labels) -> Iterable[str]:
+        cumulative = 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            cumulative += n
+            yield f"{family}_bucket{_format_labels(labels, repr(bound))} {cumulative}"
+        yield f"{family}_bucket{_format_labels(labels, '+Inf')} {self.count}"
+        yield f"{family}_sum{_format_labels(labels)} {self.sum:.6f}"
+        yield f"{family}_count{_format_labels(labels)} {self.count}"
+
+
+class LatencyRecorder:
+    """Histograms for the sessions in this process, exported as Prometheus text."""
+
+    def __init__(self, directory: Path = METRICS_DIR, session_ttl: float = SESSION_TTL):
+        self.path = directory / f"latency-{os.getpid()}.prom"
+        self.session_ttl = session_ttl
+        self._series: dict[str, dict[Labels, Histogram]] = {family: {} for family in FAMILIES}
+        self._ended: dict[str, float] = {}  # session_id -> when it ended (monotonic)
+        self._lock = threading.Lock()
+
+    def observe(self, family: str, seconds: float, **labels: str) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._series[family]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(seconds)
+
+    def end_session(self, session_id: str) -> None:
+        """Keep exporting the session's series for ``session_ttl``, then drop them."""
+        with self._lock:
+            self._ended[session_id] = time.monotonic()
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.session_ttl
+        expired = {sid for sid, ended in self._ended.items() if ended < cutoff}
+        if not expired:
+            return
+        for series in self._series.values():
+            for key in [k for k in series if dict(k).get("session_id") in expired]:
+                del series[key]
+        for sid in expired:
+            del self._ended[sid]
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            self._expire()
+            for family, series in self._series.items():
+                lines.append(f"# HELP {family} {FAMILIES[family]}")
+                lines.append(f"# TYPE {family} histogram")
+                for labels, histogram in series.items():
+                    lines.extend(histogram.render(family, labels))
+        return "\n".join(lines) + "\n"
+
+    def flush(self) -> None:
+        """Write this process's series for /metrics (atomic replace; call off the event loop)."""
+        text = self.render()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, self.path)
+
+
+def collect(directory: Path = METRICS_DIR, max_age: float = SESSION_TTL) -> str:
+    """Merge every process's file into one exposition (HELP/TYPE once per family).
+
+    Files not rewritten for ``max_age`` belong to processes that are gone and
+    whose sessions have aged out; they are removed.
+    """
+    samples: dict[str, list[str]] = {family: [] for family in FAMILIES}
+    now = time.time()
+    for path in sorted(directory.glob("latency-*.prom")):
+        try:
+            if now - path.stat().st_mtime > max_age:
+                path.unlink()
+                continue
+            text = path.read_text()
+        except OSError:
+            continue  # replaced or removed while we looked
+        for line in text.splitlines():
+            if not line or line.startswith("#"):
+                continue
+            family = next((f for f in FAMILIES if line.startswith(f + "_")), None)
+            if family is not None:
+                samples[family].append(line)
+    lines: list[str] = []
+    for family, help_text in FAMILIES.items():
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} histogram")
+        lines.extend(samples[family])
+    return "\n".join(lines) + "\n"
+
+
+# One recorder per process
+RECORDER = LatencyRecorder()
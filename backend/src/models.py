@@ -0,0 +1,172 @@
+# Data Models - compact records for products, order lines and orders
+#
+# Slotted dataclasses instead of nested dicts: no per-instance __dict__, sizes
+# stored as shared tuples, and repeated strings (categories, colors, product ids
+# and names copied into order lines) interned and buyer dicts shared, so each
+# distinct value is stored once per process. Line totals are computed rather than stored.
+#
+# JSON stays in the ACP-style shape (see README): ``to_dict`` writes it and
+# ``from_dict`` reads it, along with the older flat product shape and the order
+# shape agent.py used to write.
+import sys
+from dataclasses import dataclass
+from typing import Any, Optional
+
+_SHARED_TUPLES: dict[tuple[str, ...], tuple[str, ...]] = {}
+_SHARED_BUYERS: dict[tuple[tuple[str, str], ...], dict[str, str]] = {}
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _shared_tuple(values) -> tuple[str, ...]:
+    key = tuple(_intern(v) for v in values or ())
+    return _SHARED_TUPLES.setdefault(key, key)
+
+
+def _shared_buyer(buyer: Optional[dict[str, str]]) -> Optional[dict[str, str]]:
+    """One dict per distinct buyer; orders treat it as read-only."""
+    if not buyer:
+        return None
+    key = tuple(sorted(buyer.items()))
+    return _SHARED_BUYERS.setdefault(key, {k: _intern(v) for k, v in key})
+
+
+@dataclass
+class Product:
+    __slots__ = (
+        "category", "color", "currency", "description", "extra", "id",
+        "image_url", "in_stock", "name", "price", "sizes",
+    )
+    id: str
+    name: str
+    description: str
+    price: int
+    currency: str
+    category: str
+    color: Optional[str]
+    sizes: tuple[str, ...]
+    extra: Optional[dict[str, Any]]  # remaining attributes (material, capacity, ...)
+    in_stock: bool
+    image_url: Optional[str]
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "Product":
+        """Accepts the ACP shape (``attributes`` nested) or the old flat shape."""
+        attributes = dict(raw.get("attributes") or {})
+        color = attributes.pop("color", None) or raw.get("color")
+        sizes = attributes.pop("sizes", None) or raw.get("sizes")
+        if raw.get("material") and "material" not in attributes:
+            attributes["material"] = raw["material"]
+        return cls(
+            id=_intern(str(raw["id"])),
+            name=_intern(raw.get("name", "")),
+            description=raw.get("description", ""),
+            price=raw.get("price", 0),
+            currency=_intern(raw.get("currency", "INR")),
+            category=_intern((raw.get("category") or "").lower()),
+            color=_intern(color.lower()) if color else None,
+            sizes=_shared_tuple(sizes),
+            extra={k: _intern(v) for k, v in attributes.items()} or None,
+            in_stock=raw.get("in_stock", True),
+            image_url=raw.get("image_url"),
+        )
+
+    def to_dict(self) -> dict:
+        attributes: dict[str, Any] = {}
+        if self.color:
+            attributes["color"] = self.color
+        if self.extra:
+            attributes.update(self.extra)
+        if self.sizes:
+            attributes["sizes"] = list(self.sizes)
+        product = {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "price": self.price,
+            "currency": self.currency,
+            "category": self.category,
+            "attributes": attributes,
+            "in_stock": self.in_stock,
+        }
+        if self.image_url:
+            product["image_url"] = self.image_url
+        return product
+
+
+@dataclass
+class OrderLine:
+    __slots__ = ("name", "product_id", "quantity", "size", "unit_price")
+    product_id: str
+    name: str
+    unit_price: int
+    quantity: int
+    size: Optional[str]
+
+    @property
+    def line_total(self) -> int:
+        return self.unit_price * self.quantity
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "OrderLine":
+        size = raw.get("size") or (raw.get("attrs") or {}).get("size")
+        return cls(
+            product_id=_intern(raw["product_id"]),
+            name=_intern(raw.get("product_name") or raw.get("name") or ""),
+            unit_price=raw.get("unit_amount", raw.get("unit_price", 0)),
+            quantity=int(raw.get("quantity", 1)),
+            size=_intern(size) if size else None,
+        )
+
+    def to_dict(self, currency: str) -> dict:
+        line = {
+            "product_id": self.product_id,
+            "product_name": self.name,
+            "quantity": self.quantity,
+            "unit_amount": self.unit_price,
+            "currency": currency,
+            "line_total": self.line_total,
+        }
+        if self.size:
+            line["size"] = self.size
+        return line
+
+
+@dataclass
+class Order:
+    __slots__ = ("buyer", "created_at", "currency", "id", "lines", "status", "total")
+    id: str
+    status: str
+    lines: tuple[OrderLine, ...]
+    total: int
+    currency: str
+    created_at: str
+    buyer: Optional[dict[str, str]]
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "Order":
+        """Accepts the ACP shape (``line_items``) or the one agent.py used to write (``items``)."""
+        lines = tuple(OrderLine.from_dict(li) for li in raw.get("line_items") or raw.get("items") or ())
+        total = raw.get("total_amount", raw.get("total"))
+        return cls(
+            id=raw["id"],
+            status=_intern(raw.get("status", "CONFIRMED")),
+            lines=lines,
+            total=sum(li.line_total for li in lines) if total is None else total,
+            currency=_intern(raw.get("currency", "INR")),
+            created_at=raw.get("created_at", ""),
+            buyer=_shared_buyer(raw.get("buyer")),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "line_items": [li.to_dict(self.currency) for li in self.lines],
+            "total_amount": self.total,
+            "currency": self.currency,
+            "created_at": self.created_at,
+            "buyer": self.buyer or {"name": "Guest"},
+        }
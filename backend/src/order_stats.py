@@ -0,0 +1,80 @@
+# Order Statistics - store-wide counters maintained as orders are committed
+#
+# Every order is applied once when it enters the store, updating the order
+# count, revenue, per-product and per-category totals. Reading the stats never
+# walks the order history; the only per-read work is picking the top products,
+# which depends on the number of distinct products and is cached until the next
+# order arrives.
+import heapq
+import threading
+from typing import Any, Callable, Optional
+
+from models import Order
+
+TOP_PRODUCTS = 5
+
+
+class OrderStats:
+    """Materialized counters over a stream of orders.
+
+    category_of: maps a product id to its category (e.g. via the catalog index);
+                 unknown products are counted under "other".
+    """
+
+    def __init__(self, category_of: Optional[Callable[[str], Optional[str]]] = None):
+        self.category_of = category_of or (lambda product_id: None)
+        self._lock = threading.Lock()
+        self.version = 0  # bumped on every change (never goes back, so usable as an ETag)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.version += 1
+            self.orders = 0
+            self.revenue = 0
+            self.currency = "INR"
+            self._products: dict[str, list] = {}  # product_id -> [name, quantity, revenue]
+            self._categories: dict[str, int] = {}
+            self._snapshot: Optional[dict[str, Any]] = None
+
+    def _apply(self, order: Order, sign: int) -> None:
+        self.orders += sign
+        self.revenue += sign * order.total
+        self.currency = order.currency
+        for line in order.lines:
+            product = self._products.setdefault(line.product_id, [line.name, 0, 0])
+            product[1] += sign * line.quantity
+            product[2] += sign * line.line_total
+            category = self.category_of(line.product_id) or "other"
+            self._categories[category] = self._categories.get(category, 0) + sign * line.line_total
+
+    def add(self, order: Order, replaces: Optional[Order] = None) -> None:
+        """Count a newly committed order; ``replaces`` is an earlier copy it supersedes."""
+        with self._lock:
+            if replaces is not None:
+                self._apply(replaces, -1)
+            self._apply(order, 1)
+            self.version += 1
+            self._snapshot = None
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current stats as a JSON-ready dict (shared; don't mutate)."""
+        with self._lock:
+            if self._snapshot is None:
+                top = heapq.nlargest(TOP_PRODUCTS, self._products.items(), key=lambda kv: kv[1][2])
+                self._snapshot = {
+                    "total_orders": self.orders,
+                    "total_revenue": self.revenue,
+                    "average_order_value": round(self.revenue / self.orders, 2) if self.orders else 0,
+                    "currency": self.currency,
+                    "top_products": [
+                        {"product_id": pid, "product_name": name, "quantity": qty, "revenue": revenue}
+                        for pid, (name, qty, revenue) in top
+                        if qty > 0
+                    ],
+                    "revenue_by_category": dict(
+                        sorted(self._categories.items(), key=lambda kv: -kv[1])
+                    ),
+                    "version": self.version,
+                }
+            return self._snapshot
@@ -0,0 +1,740 @@
+# Order Journal - append-only order persistence
+#
+# Orders are written as one compact JSON record per line. Placing an order is a
+# single append (constant time regardless of history size); fsync is batched so
+# a burst of checkouts shares one disk flush. Torn or duplicate records are
+# dropped by compaction, which rewrites the journal and atomically swaps it in.
+#
+# The journal is shared by every process that places or reads orders (one job
+# process per room, plus the HTTP API). Writers and compaction serialize on an
+# advisory lock file next to the journal; readers take a shared lock.
+#
+# OrderIndex answers "last order", "order by id" and "my last N orders" by
+# seeking to byte offsets kept in a sidecar index file, so only the records
+# asked for are ever parsed. It also keeps running per-customer totals.
+#
+# AsyncOrderWriter is the front end for code running on an event loop: it keeps
+# file I/O and JSON work off the loop and coalesces concurrent checkouts into
+# one write and one fsync.
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+logger = logging.getLogger("voice_game_master")
+
+PathLike = Union[str, Path]
+
+# Shared location used by agent.py and orders.py (override with ORDERS_JOURNAL)
+DEFAULT_JOURNAL_PATH = Path(
+    os.getenv("ORDERS_JOURNAL", Path(__file__).parent / "orders.jsonl")
+)
+# Where the code before the journal kept orders.json: orders.py next to itself, the
+# agent in the directory it was started from (backend/ in the README)
+LEGACY_ORDERS_FILE = Path(__file__).parent / "orders.json"
+
+
+class OrderJournal:
+    """Append-only JSONL journal of orders.
+
+    sync_batch:     fsync after this many appends...
+    sync_interval:  ...or once this many seconds have passed since the last fsync.
+    compact_min_dead: compact once a scan has seen at least this many dead
+                    (corrupt or superseded) records.
+    legacy_paths:   orders.json array files to import; each is imported once,
+                    recorded in the ``.imported`` sidecar.
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        legacy_paths: Iterable[PathLike] = (),
+        sync_batch: int = 16,
+        sync_interval: float = 0.5,
+        compact_min_dead: int = 64,
+    ):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.imported_path = self.path.with_name(self.path.name + ".imported")
+        self.legacy_paths = [Path(p) for p in legacy_paths]
+        self.sync_batch = sync_batch
+        self.sync_interval = sync_interval
+        self.compact_min_dead = compact_min_dead
+
+        self._fh = None
+        self._mutex = threading.RLock()  # the file handle is shared with writer threads
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._dead = 0
+        # time spent waiting for the lock file, i.e. contention with other processes
+        self.lock_waits = 0
+        self.lock_wait_seconds = 0.0
+        self.max_lock_wait = 0.0
+
+        legacy = [p for p in self.legacy_paths if p.exists()]
+        if legacy:
+            self._import_legacy_files(legacy)
+
+    # -------------------------
+    # Locking
+    # -------------------------
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool):
+        if fcntl is None:
+            yield
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            t0 = time.perf_counter()
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            waited = time.perf_counter() - t0
+            self.lock_waits += 1
+            self.lock_wait_seconds += waited
+            self.max_lock_wait = max(self.max_lock_wait, waited)
+            yield
+        finally:
+            os.close(fd)  # closing the descriptor releases the lock
+
+    def file_id(self) -> Optional[tuple[int, int]]:
+        """Identity of the current journal file; changes when compaction swaps it."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_dev, st.st_ino)
+
+    # -------------------------
+    # Writing
+    # -------------------------
+    def _open(self):
+        # compaction in another process replaces the file; drop the stale handle
+        if self._fh is not None:
+            st = os.fstat(self._fh.fileno())
+            if (st.st_dev, st.st_ino) != self.file_id():
+                self._fh.close()
+                self._fh = None
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "ab")  # noqa: SIM115 - kept open across appends
+        # a crash mid-append can leave a torn last line; terminate it so the
+        # next record starts on a fresh line and the fragment is skipped on read
+        size = os.fstat(self._fh.fileno()).st_size
+        if size > 0:
+            with open(self.path, "rb") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    self._fh.write(b"\n")
+        return self._fh
+
+    def append(self, order: dict) -> None:
+        """Append one order. Constant time; fsync is batched."""
+        data = _encode(order)
+        with self._mutex:
+            with self._locked(exclusive=True):
+                fh = self._open()
+                fh.write(data)
+                fh.flush()
+            self._pending += 1
+            if (
+                self._pending >= self.sync_batch
+                or time.monotonic() - self._last_sync >= self.sync_interval
+            ):
+                self.sync()
+
+    def append_batch(self, orders: list[dict]) -> None:
+        """Append several orders in one write and fsync them before returning."""
+        data = b"".join(_encode(order) for order in orders)
+        with self._mutex:
+            with self._locked(exclusive=True):
+                fh = self._open()
+                fh.write(data)
+                fh.flush()
+            self._pending += len(orders)
+            self.sync()
+
+    def sync(self) -> None:
+        """Force any batched appends to disk."""
+        with self._mutex:
+            if self._fh is not None and self._pending:
+                os.fsync(self._fh.fileno())
+            self._pending = 0
+            self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        with self._mutex:
+            if self._fh is not None:
+                self.sync()
+                self._fh.close()
+                self._fh = None
+
+    def _flush(self) -> None:
+        with self._mutex:
+            if self._fh is not None:
+                self._fh.flush()
+
+    # -------------------------
+    # Reading
+    # -------------------------
+    def iter_orders(self) -> Iterator[dict]:
+        """Yield orders in journal order, last write wins for duplicate ids."""
+        self._flush()
+        if not self.path.exists():
+            return
+        seen = set()
+        records = []
+        dead = 0
+        with self._locked(exclusive=False), open(self.path, "rb") as f:
+            for line in f:
+                order = _decode(line)
+                if order is None:
+                    if line.strip():
+                        dead += 1
+                    continue
+                records.append(order)
+        # dedupe from the end so the newest copy of an order is kept
+        kept = []
+        for order in reversed(records):
+            oid = order.get("id")
+            if oid is not None and oid in seen:
+                dead += 1
+                continue
+            seen.add(oid)
+            kept.append(order)
+        self._dead = dead
+        yield from reversed(kept)
+
+    def read_all(self) -> list[dict]:
+        orders = list(self.iter_orders())
+        self.maybe_compact()
+        return orders
+
+    def read_from(self, offset: int) -> tuple[list[dict], int]:
+        """Read complete records appended at or after ``offset``.
+
+        Returns the orders and the offset to resume from. A partially written
+        last line is left for the next call.
+        """
+        self._flush()
+        orders = []
+        if not self.path.exists():
+            return orders, offset
+        with self._locked(exclusive=False), open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                order = _decode(line)
+                if order is not None:
+                    orders.append(order)
+        return orders, offset
+
+    # -------------------------
+    # Maintenance
+    # -------------------------
+    def maybe_compact(self) -> bool:
+        """Compact if the last scan found enough dead records."""
+        if self._dead < self.compact_min_dead:
+            return False
+        self.compact()
+        return True
+
+    def compact(self) -> None:
+        """Rewrite the journal without dead records and atomically swap it in."""
+        with self._mutex:
+            self.close()
+            with self._locked(exclusive=True):
+                # rescan under the lock so appends from other processes are not dropped
+                orders = list(self._scan_unlocked())
+                self._write_atomic(orders)
+            self._dead = 0
+        logger.info("Compacted order journal %s (%d orders)", self.path, len(orders))
+
+    def _scan_unlocked(self) -> Iterator[dict]:
+        latest = {}
+        anonymous = []
+        if not self.path.exists():
+            return iter(())
+        with open(self.path, "rb") as f:
+            for line in f:
+                order = _decode(line)
+                if order is None:
+                    continue
+                oid = order.get("id")
+                if oid is None:
+                    anonymous.append(order)
+                else:
+                    latest.pop(oid, None)
+                    latest[oid] = order
+        return iter(anonymous + list(latest.values()))
+
+    def _import_legacy_files(self, paths: list[Path]) -> None:
+        with self._locked(exclusive=True):
+            # another process may have imported some while we waited for the lock
+            try:
+                done = set(self.imported_path.read_text().splitlines())
+            except FileNotFoundError:
+                done = set()
+            imported, orders = [], []
+            for path in dict.fromkeys(p.resolve() for p in paths):
+                if str(path) in done:
+                    continue
+                legacy = self.read_legacy(path)
+                if legacy is not None:
+                    imported.append(path)
+                    orders.extend(legacy)
+                    logger.info("Importing %d orders from %s into %s", len(legacy), path, self.path)
+            if not imported:
+                return
+            with self._mutex:
+                self.close()
+                # legacy orders predate the journal's own
+                self._write_atomic(orders + list(self._scan_unlocked()))
+            with open(self.imported_path, "a") as f:
+                f.writelines(f"{path}\n" for path in imported)
+
+    @staticmethod
+    def read_legacy(legacy_path: PathLike) -> Optional[list[dict]]:
+        """Orders in a legacy ``orders.json`` array file, None if it can't be read."""
+        try:
+            with open(legacy_path) as f:
+                orders = json.load(f)
+        except Exception as e:
+            logger.warning("Could not import legacy orders from %s: %s", legacy_path, e)
+            return None
+        if not isinstance(orders, list):
+            logger.warning("Could not import legacy orders from %s: not a JSON array", legacy_path)
+            return None
+        return orders
+
+    def _write_atomic(self, orders: list[dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            for order in orders:
+                f.write(_encode(order))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        _fsync_dir(self.path.parent)
+
+
+def customer_key(order: dict) -> Optional[str]:
+    """Identity an order is filed under: the buyer's id, else their name."""
+    buyer = order.get("buyer") or {}
+    return buyer.get("id") or buyer.get("name")
+
+
+def order_total(order: dict) -> int:
+    total = order.get("total_amount", order.get("total"))
+    return total if isinstance(total, (int, float)) else 0
+
+
+class OrderIndex:
+    """Byte-offset index over an OrderJournal.
+
+    Keeps order id -> position of its newest record and, per customer, the
+    positions of their orders in append order (the last one is their most
+    recent order), plus a running order count and amount spent per customer.
+    The index is persisted next to the journal as ``<journal>.idx``: a header
+    naming the journal file it describes, then one ``[offset, length, id,
+    customer, total]`` entry per journal line. On open only the entries are
+    read; the journal itself is scanned just past the last indexed line.
+    Compaction swaps the journal file, which makes the index rebuild itself
+    from one full scan. Processes append entries under an exclusive lock on
+    the index file, skipping lines another process has already indexed; an
+    index found with unreadable or duplicate entries is rewritten.
+    """
+
+    FORMAT = 2
+
+    def __init__(self, journal: OrderJournal):
+        self.journal = journal
+        self.path = journal.path.with_name(journal.path.name + ".idx")
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, file_id: Optional[tuple[int, int]]) -> None:
+        self._file_id = file_id
+        self._upto = 0  # journal bytes covered by the index
+        self._by_id: dict[str, int] = {}  # order id -> position of its newest record
+        # every record in journal order; per-customer lists hold positions in these
+        self._offsets: list[int] = []
+        self._ids: list[str] = []
+        self._customers: list[Optional[str]] = []
+        self._totals: list[int] = []
+        self._by_customer: dict[str, list[int]] = {}
+        self._spent: dict[str, list[int]] = {}  # customer -> [live order count, amount]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._by_id)
+
+    # -------------------------
+    # Maintenance
+    # -------------------------
+    def _add(self, offset: int, oid: Optional[str], customer: Optional[str], total: int) -> None:
+        if oid is None:
+            return
+        pos = len(self._offsets)
+        if customer is not None:
+            customer = sys.intern(customer)
+        previous = self._by_id.get(oid)
+        if previous is not None and self._customers[previous] is not None:
+            # a rewritten order replaces the earlier copy in its customer's totals
+            spent = self._spent[self._customers[previous]]
+            spent[0] -= 1
+            spent[1] -= self._totals[previous]
+        self._by_id[oid] = pos
+        if customer is not None:
+            self._by_customer.setdefault(customer, []).append(pos)
+            spent = self._spent.setdefault(customer, [0, 0])
+            spent[0] += 1
+            spent[1] += total
+        self._offsets.append(offset)
+        self._ids.append(oid)
+        self._customers.append(customer)
+        self._totals.append(total)
+
+    def _refresh(self) -> None:
+        """Bring the index up to date with the journal (caller holds ``_lock``)."""
+        self.journal._flush()
+        file_id = self.journal.file_id()
+        if file_id != self._file_id:
+            self._reset(file_id)
+            if file_id is None:
+                return
+            self._load(file_id)
+        if not self.journal.path.exists():
+            return
+        # the shared lock keeps compaction from swapping the journal between the scan
+        # and persisting what it found
+        with self.journal._locked(exclusive=False), open(self.journal.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if (st.st_dev, st.st_ino) != self._file_id:
+                self._file_id = None  # swapped since the check above; reload next time
+                return
+            entries = self._scan(f, self._upto)
+            if entries:
+                self._persist(entries)
+        for offset, _, oid, customer, total in entries:
+            self._add(offset, oid, customer, total)
+        if entries:
+            self._upto = entries[-1][0] + entries[-1][1]
+
+    def _load(self, file_id: tuple[int, int]) -> None:
+        """Read persisted entries for this journal file; start over if they describe another."""
+        try:
+            with self._index_file(exclusive=False) as f:
+                if not self._header_matches(_decode(f.readline()), file_id):
+                    raise FileNotFoundError
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            self._rewrite(file_id)
+            return
+        # skip what can't be read (a torn write from an older version, a crash)
+        entries = [e for e in map(_index_entry, lines) if e is not None]
+        # several processes may have indexed the same lines; use entries in offset order
+        entries.sort(key=lambda e: e[0])
+        used = []
+        for entry in entries:
+            if entry[0] < self._upto:
+                continue  # a duplicate
+            # index the journal lines whose entries were lost, if they end where this one starts
+            gap = self._scan_between(self._upto, entry[0]) if entry[0] > self._upto else []
+            if gap is None:
+                break  # the journal scan fills in the rest
+            for offset, length, oid, customer, total in (*gap, entry):
+                self._add(offset, oid, customer, total)
+                self._upto = offset + length
+            used.extend(gap)
+            used.append(entry)
+        # inode numbers can be reused by a later compaction; spot-check the newest entry
+        if self._ids and self._read([self._entry(len(self._ids) - 1)]) is None:
+            logger.info("Order index %s is stale, rebuilding", self.path)
+            self._reset(file_id)
+            self._rewrite(file_id)
+        elif used != entries or len(entries) != len(lines):
+            logger.info("Order index %s has unreadable, duplicate or missing entries, rewriting", self.path)
+            self._rewrite(file_id, used)
+
+    def _scan_between(self, start: int, end: int) -> Optional[list[list]]:
+        """Index entries for the journal lines from ``start`` to ``end``, None if no line ends there."""
+        try:
+            with open(self.journal.path, "rb") as f:
+                entries = self._scan(f, start, end)
+        except FileNotFoundError:
+            return None
+        if not entries or entries[-1][0] + entries[-1][1] != end:
+            return None
+        return entries
+
+    @staticmethod
+    def _scan(f, offset: int, end: Optional[int] = None) -> list[list]:
+        """Index entries for the complete journal lines from ``offset`` on (up to ``end``)."""
+        entries = []
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n") or (end is not None and offset >= end):
+                break
+            order = _decode(line)
+            if order is None:
+                entries.append([offset, len(line), None, None, 0])
+            else:
+                entries.append([offset, len(line), order.get("id"), customer_key(order), order_total(order)])
+            offset += len(line)
+        return entries
+
+    def _header_matches(self, header: Optional[dict], file_id: Optional[tuple[int, int]]) -> bool:
+        return bool(header) and header.get("format") == self.FORMAT and tuple(header.get("file_id", ())) == file_id
+
+    def _rewrite(self, file_id: tuple[int, int], entries: list[list] = ()) -> None:
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(_encode({"format": self.FORMAT, "file_id": list(file_id)}))
+            f.write(b"".join(_encode(e) for e in entries))
+        os.replace(tmp, self.path)
+
+    @contextlib.contextmanager
+    def _index_file(self, exclusive: bool):
+        """The index file open for reading and appending (O_APPEND), flock'd while in use."""
+        with open(os.open(self.path, os.O_RDWR | os.O_APPEND), "rb+", buffering=0) as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            if exclusive and os.fstat(f.fileno()).st_ino != os.stat(self.path).st_ino:
+                raise FileNotFoundError(self.path)  # rewritten while we waited for the lock
+            yield f
+
+    def _persist(self, entries: list[list]) -> None:
+        try:
+            with self._index_file(exclusive=True) as f:
+                if not self._header_matches(_decode(f.readline()), self._file_id):
+                    return  # index file belongs to another journal file; leave it be
+                # another process may have indexed some of these lines already
+                upto = _indexed_upto(f)
+                data = memoryview(b"".join(_encode(e) for e in entries if e[0] >= upto))
+                while data:
+                    data = data[f.write(data):]
+        except FileNotFoundError:
+            return
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    def _read(self, wanted: list[tuple[int, str]]) -> Optional[list[dict]]:
+        """Records at the given (offset, id) pairs, or None if the journal was swapped."""
+        orders = []
+        try:
+            with open(self.journal.path, "rb") as f:
+                for offset, oid in wanted:
+                    f.seek(offset)
+                    order = _decode(f.readline())
+                    if order is None or order.get("id") != oid:
+                        return None
+                    orders.append(order)
+        except FileNotFoundError:
+            return None
+        return orders
+
+    def _entry(self, pos: int) -> tuple[int, str]:
+        return self._offsets[pos], self._ids[pos]
+
+    def _lookup(self, select) -> list[dict]:
+        """Refresh, pick (offset, id) pairs with ``select`` and read them; if compaction
+        swapped the journal in between, re-index and try once more."""
+        with self._lock:
+            for _ in range(2):
+                self._refresh()
+                orders = self._read(select())
+                if orders is not None:
+                    return orders
+                self._file_id = None
+            return []
+
+    def get(self, order_id: str) -> Optional[dict]:
+        """The newest copy of an order, or None."""
+        def select():
+            pos = self._by_id.get(order_id)
+            return [] if pos is None else [self._entry(pos)]
+
+        orders = self._lookup(select)
+        return orders[0] if orders else None
+
+    def last(self, n: int = 1, customer: Optional[str] = None) -> list[dict]:
+        """The ``n`` most recent orders, newest first; only ``customer``'s if given."""
+        def select():
+            positions = (
+                range(len(self._offsets)) if customer is None else self._by_customer.get(customer, ())
+            )
+            picked = []
+            for pos in reversed(positions):
+                if len(picked) == n:
+                    break
+                # skip records a later copy of the same order superseded
+                if self._by_id[self._ids[pos]] == pos:
+                    picked.append(self._entry(pos))
+            return picked
+
+        return self._lookup(select)
+
+    def customer_stats(self, customer: str) -> dict[str, Any]:
+        """Order count, amount spent and average order value for ``customer``."""
+        with self._lock:
+            self._refresh()
+            count, spent = self._spent.get(customer, (0, 0))
+        return {
+            "orders": count,
+            "total_spent": spent,
+            "average_order_value": round(spent / count, 2) if count else 0,
+        }
+
+
+class AsyncOrderWriter:
+    """Non-blocking, durable order appends for code running on an event loop.
+
+    ``await append(order)`` returns once the order has been fsync'd. Appends go
+    through a bounded queue (callers wait when it is full) to a single writer
+    task; whatever queued up while the previous write was in flight is written
+    as one batch with one fsync in a worker thread. Reads also run in a worker
+    thread.
+
+    max_queue:  appends waiting to be written before callers are held back.
+    max_batch:  most orders coalesced into one write.
+    """
+
+    def __init__(self, journal: OrderJournal, max_queue: int = 1024, max_batch: int = 128):
+        self.journal = journal
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.batches = 0
+        self.max_depth = 0
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(self.max_queue)
+            self._task = loop.create_task(self._run(self._queue))
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await asyncio.to_thread(self.journal.append_batch, [order for order, _ in batch])
+            except Exception as e:
+                logger.exception("Order journal write failed")
+                for _, ack in batch:
+                    if not ack.done():
+                        ack.set_exception(e)
+            else:
+                for _, ack in batch:
+                    if not ack.done():
+                        ack.set_result(None)
+                self.written += len(batch)
+            self.batches += 1
+            for _ in batch:
+                queue.task_done()
+
+    async def append(self, order: dict) -> None:
+        """Queue an order and wait until it is durable on disk."""
+        self._ensure_started()
+        ack = self._loop.create_future()
+        await self._queue.put((order, ack))
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        await ack
+
+    async def read_all(self) -> list[dict]:
+        return await asyncio.to_thread(self.journal.read_all)
+
+    async def aclose(self) -> None:
+        """Wait for queued appends to be written, then stop the writer task."""
+        if self._task is None:
+            return
+        if self._loop is asyncio.get_running_loop() and not self._task.done():
+            await self._queue.join()
+        self._task.cancel()
+        self._task = None
+        await asyncio.to_thread(self.journal.close)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch": round(self.written / self.batches, 2) if self.batches else 0.0,
+            "max_queue_depth": self.max_depth,
+            "lock_wait_ms": round(self.journal.lock_wait_seconds * 1000, 1),
+            "max_lock_wait_ms": round(self.journal.max_lock_wait * 1000, 1),
+        }
+
+
+def default_journal() -> OrderJournal:
+    """Journal at the shared default location, seeded from legacy orders.json files."""
+    return OrderJournal(DEFAULT_JOURNAL_PATH, legacy_paths=(Path.cwd() / "orders.json", LEGACY_ORDERS_FILE))
+
+
+def _fsync_dir(path: Path) -> None:
+    # make the rename itself durable; not supported on every platform
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _index_entry(line: bytes) -> Optional[list]:
+    """An OrderIndex ``[offset, length, id, customer, total]`` entry, None if malformed."""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    if not (isinstance(entry, list) and len(entry) == 5 and all(isinstance(n, int) for n in entry[:2])):
+        return None
+    return entry
+
+
+def _indexed_upto(f, tail: int = 4096) -> int:
+    """Journal offset just past the last entry in an index file (0 if it has none)."""
+    size = os.fstat(f.fileno()).st_size
+    f.seek(max(0, size - tail))
+    for line in reversed(f.read().splitlines()):
+        entry = _index_entry(line)
+        if entry is not None:
+            return entry[0] + entry[1]
+    return 0
+
+
+def _encode(order: dict) -> bytes:
+    return (json.dumps(order, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _decode(line: bytes) -> Optional[dict]:
+    try:
+        order = json.loads(line)
+    except ValueError:
+        return None
+    return order if isinstance(order, dict) else None
@@ -1,41 +1,138 @@
 # Order Management - ACP-inspired structure
-import json
+import threading
 import uuid
+from bisect import bisect_left, insort
 from datetime import datetime
-from pathlib import Path
-from typing import List, Dict
+from typing import Callable, List, Dict, Tuple
 
-# Orders file path
-ORDERS_FILE = Path(__file__).parent / "orders.json"
+from models import Order, OrderLine
+from order_stats import OrderStats
+from order_store import LEGACY_ORDERS_FILE, OrderIndex, customer_key, default_journal
 
-# In-memory orders (also persisted to file)
-ORDERS = []
+# Orders file path (legacy whole-array file, imported once into the shared journal)
+ORDERS_FILE = LEGACY_ORDERS_FILE
 
+# Shared with agent.py; appends are locked so concurrent job processes don't lose orders
+_journal = default_journal()
 
-def load_orders():
-    """Load orders from JSON file"""
-    global ORDERS
-    if ORDERS_FILE.exists():
+# Offset index over the journal: single orders are read without loading the history
+_index = OrderIndex(_journal)
+
+
+def _category_of(product_id: str) -> str | None:
+    from catalog import get_product_by_id
+    product = get_product_by_id(product_id)
+    return product.category if product else None
+
+
+def order_key(order: Order) -> Tuple[str, str]:
+    """Listing order (and pagination cursor): creation time, then id"""
+    return (order.created_at, order.id)
+
+
+# In-memory orders (mirror of the journal as Order records, caught up on each read),
+# oldest first by order_key; also per customer, so filtered pages are a bisect away
+ORDERS: List[Order] = []
+_by_id: Dict[str, Order] = {}
+_by_customer: Dict[str, List[Order]] = {}
+_offset = 0
+_file_id = None
+_loaded = False  # the journal is read on first use, not at import
+_lock = threading.RLock()  # the HTTP API calls in from its worker threads
+
+# Store-wide counters, updated as each order enters the mirror
+STATS = OrderStats(category_of=_category_of)
+
+# Called with each batch of orders new to this process (e.g. to push them to dashboards)
+_listeners: List[Callable[[List[Order]], None]] = []
+
+
+def add_listener(callback: Callable[[List[Order]], None]):
+    """Call ``callback(new_orders)`` whenever orders enter the store (from any process)"""
+    _listeners.append(callback)
+
+
+def _notify(new_orders: List[Order]):
+    if not new_orders:
+        return
+    for callback in _listeners:
         try:
-            with open(ORDERS_FILE, 'r') as f:
-                ORDERS = json.load(f)
+            callback(new_orders)
         except Exception as e:
-            print(f"Error loading orders: {e}")
-            ORDERS = []
+            print(f"Order listener failed: {e}")
+
+
+def _insert(orders: List[Order], order: Order):
+    # orders almost always arrive in time order; insort only for stragglers
+    if not orders or order_key(order) >= order_key(orders[-1]):
+        orders.append(order)
     else:
-        ORDERS = []
+        insort(orders, order, key=order_key)
+
+
+def _remove(orders: List[Order], order: Order):
+    pos = bisect_left(orders, order_key(order), key=order_key)
+    if pos < len(orders) and orders[pos] is order:
+        del orders[pos]
+
+
+def _ingest(raw_orders: List[Dict]) -> List[Order]:
+    ingested = []
+    for raw in raw_orders:
+        order = Order.from_dict(raw)
+        customer = customer_key(raw)
+        previous = _by_id.get(order.id)
+        if previous is not None:
+            # a later copy of the same order replaces the earlier one
+            _remove(ORDERS, previous)
+            _remove(_by_customer.get(customer_key({"buyer": previous.buyer}), []), previous)
+        _by_id[order.id] = order
+        _insert(ORDERS, order)
+        if customer is not None:
+            _insert(_by_customer.setdefault(customer, []), order)
+        STATS.add(order, replaces=previous)
+        ingested.append(order)
+    return ingested
+
+
+def load_orders():
+    """Load orders from the journal"""
+    global ORDERS, _by_id, _by_customer, _offset, _file_id, _loaded
+    with _lock:
+        first_load = not _loaded
+        known = _by_id
+        _file_id = _journal.file_id()
+        raw, _offset = _journal.read_from(0)
+        ORDERS, _by_id, _by_customer = [], {}, {}
+        STATS.reset()
+        ingested = _ingest(raw)
+        _loaded = True
+        if not first_load:
+            # after a compaction most orders are already known; only announce the rest
+            _notify([o for o in ingested if o.id not in known])
+
+
+def _refresh():
+    """Pick up orders appended by other processes since the last read"""
+    global _offset
+    with _lock:
+        if not _loaded or _journal.file_id() != _file_id:
+            # journal was compacted (or created) by another process; offsets changed
+            load_orders()
+            return
+        new_orders, _offset = _journal.read_from(_offset)
+        _notify(_ingest(new_orders))
 
 
 def save_orders():
-    """Save orders to JSON file"""
+    """Flush batched journal appends to disk"""
     try:
-        with open(ORDERS_FILE, 'w') as f:
-            json.dump(ORDERS, f, indent=2)
+        _journal.sync()
     except Exception as e:
         print(f"Error saving orders: {e}")
 
 
-def create_order(line_items: List[Dict], buyer_info: Dict | None = None) -> Dict:
+def create_order(line_items: List[Dict], buyer_info: Dict | None = None) -> Order:
     """
     Create a new order (ACP-inspired structure)
     
@@ -57,74 +154,107 @@ def create_order(line_items: List[Dict], buyer_info: Dict | None = None) -> Dict
     # Generate order ID
     order_id = f"ORD-{uuid.uuid4().hex[:8].upper()}"
     
-    # Calculate line items with prices
-    processed_items = []
-    total_amount = 0
-    
+    # Price line items from the catalog
+    lines = []
     for item in line_items:
         product = get_product_by_id(item["product_id"])
         if not product:
             continue
-        
-        quantity = item.get("quantity", 1)
-        unit_amount = product["price"]
-        line_total = unit_amount * quantity
-        
-        processed_item = {
-            "product_id": product["id"],
-            "product_name": product["name"],
-            "quantity": quantity,
-            "unit_amount": unit_amount,
-            "currency": product["currency"],
-            "line_total": line_total
-        }
-        
-        # Add size if specified
-        if "size" in item:
-            processed_item["size"] = item["size"]
-        
-        processed_items.append(processed_item)
-        total_amount += line_total
+        lines.append(OrderLine(
+            product_id=product.id,
+            name=product.name,
+            unit_price=product.price,
+            quantity=item.get("quantity", 1),
+            size=item.get("size"),
+        ))
     
     # Create order object (ACP-inspired)
-    order = {
-        "id": order_id,
-        "status": "CONFIRMED",
-        "line_items": processed_items,
-        "total_amount": total_amount,
-        "currency": "INR",
-        "created_at": datetime.utcnow().isoformat() + "Z",
-        "buyer": buyer_info or {"name": "Guest"}
-    }
-    
-    # Add to orders list
-    ORDERS.append(order)
+    order = Order(
+        id=order_id,
+        status="CONFIRMED",
+        lines=tuple(lines),
+        total=sum(li.line_total for li in lines),
+        currency="INR",
+        created_at=datetime.utcnow().isoformat() + "Z",
+        buyer=buyer_info or {"name": "Guest"},
+    )
     
-    # Save to file
-    save_orders()
+    # Append to the shared journal (on disk before the order is confirmed), then mirror it in memory
+    _journal.append_batch([order.to_dict()])
+    _refresh()
     
     return order
 
 
-def get_last_order() -> Dict | None:
+def get_last_order() -> Order | None:
     """Get the most recent order"""
-    if not ORDERS:
-        return None
-    return ORDERS[-1]
+    orders = _index.last()
+    return Order.from_dict(orders[0]) if orders else None
 
 
-def get_all_orders() -> List[Dict]:
+def get_recent_orders(n: int, customer: str | None = None) -> List[Order]:
+    """Get the n most recent orders, newest first (only the given customer's if set)"""
+    return [Order.from_dict(o) for o in _index.last(n, customer)]
+
+
+def get_all_orders() -> List[Order]:
     """Get all orders"""
+    _refresh()
     return ORDERS
 
 
-def get_order_by_id(order_id: str) -> Dict | None:
-    """Get a specific order by ID"""
-    for order in ORDERS:
-        if order["id"] == order_id:
-            return order
-    return None
+def refresh():
+    """Catch up with orders other processes appended to the journal"""
+    _refresh()
+
+
+def store_version() -> str:
+    """Changes whenever the set of orders does (journal file identity + length); use as an ETag"""
+    _refresh()
+    dev, ino = _file_id or (0, 0)
+    return f"{dev:x}-{ino:x}-{_offset:x}"
 
 
-# Load orders on module import
-load_orders()
+def list_orders(
+    limit: int | None = 50,
+    before: Tuple[str, str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    customer: str | None = None,
+) -> Tuple[List[Order], bool]:
+    """
+    One page of orders, newest first, and whether more follow
+    
+    before: order_key of the last order on the previous page (keyset cursor)
+    since / until: ISO dates or timestamps; since is inclusive, until exclusive
+    customer: buyer id (or name) the orders are filed under
+    """
+    _refresh()
+    with _lock:
+        orders = ORDERS if customer is None else _by_customer.get(customer, [])
+        lo = bisect_left(orders, since, key=lambda o: o.created_at) if since else 0
+        hi = bisect_left(orders, until, key=lambda o: o.created_at) if until else len(orders)
+        if before is not None:
+            hi = min(hi, bisect_left(orders, tuple(before), key=order_key))
+        start = lo if limit is None else max(lo, hi - limit)
+        page = orders[start:hi]
+    page.reverse()
+    return page, start > lo
+
+
+def get_stats() -> Dict:
+    """Store-wide stats: orders, revenue, average order value, top products, revenue by category"""
+    _refresh()
+    return STATS.snapshot()
+
+
+def get_customer_stats(customer: str) -> Dict:
+    """Order count, total spent and average order value for a customer"""
+    return _index.customer_stats(customer)
+
+
+def get_order_by_id(order_id: str) -> Order | None:
+    """Get a specific order by ID"""
+    order = _index.get(order_id)
+    return Order.from_dict(order) if order else None
+
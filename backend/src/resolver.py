@@ -0,0 +1,209 @@
+# Product Reference Resolver - spoken references to catalog products
+#
+# Resolves things a shopper says ("the second one", "mug-001", "black hoodie",
+# "navy hoody", "tee shirt") to a product in one indexed lookup. At build time
+# it indexes normalized tokens from ids, names, colors and categories, plus a
+# character-trigram index over that vocabulary so misheard or misspelled words
+# from speech-to-text are corrected to the closest known token.
+import heapq
+import math
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Optional
+
+from models import Product
+from search import tokenize
+
+ORDINALS = {
+    "first": 0, "1st": 0, "second": 1, "2nd": 1, "third": 2, "3rd": 2,
+    "fourth": 3, "4th": 3, "fifth": 4, "5th": 4, "sixth": 5, "6th": 5,
+    "seventh": 6, "7th": 6, "eighth": 7, "8th": 7, "last": -1,
+}
+
+# spoken / alternate words -> catalog vocabulary (after tokenize)
+SYNONYMS = {
+    "tee": "tshirt", "tshirt": "tshirt", "hoody": "hoodie", "sweatshirt": "hoodie",
+    "cup": "mug", "hat": "cap", "gray": "grey", "phone": "mobile",
+}
+
+# words that carry no product information in a reference
+FILLER = frozenset({
+    "i", "want", "would", "like", "to", "add", "buy", "get", "please", "one", "ones",
+    "item", "items", "product", "number", "no", "that", "this", "it", "my", "cart",
+    "size", "x", "quantity", "id", "order",
+})
+
+FUZZY_MIN_RATIO = 0.7
+FUZZY_SHORTLIST = 8
+
+
+@dataclass
+class Resolution:
+    product: Product
+    confidence: float  # 0..1
+    method: str  # "id", "ordinal", "tokens"
+    unmatched: int = 0  # reference words the product doesn't match
+
+
+def _trigrams(term: str) -> set[str]:
+    padded = f" {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ProductResolver:
+    def __init__(self, products: Iterable[Product]):
+        self.products: list[Product] = list(products)
+        self._pos_by_id: dict[str, int] = {}
+        self._ids: dict[str, int] = {}  # normalized id ('mug001') -> position
+        self._tokens: dict[str, set[int]] = {}  # token -> positions
+        for pos, p in enumerate(self.products):
+            self._pos_by_id[p.id] = pos
+            self._ids[_squash(p.id)] = pos
+            text = " ".join((p.id, p.name, p.color or "", p.category))
+            for tok in set(tokenize(text)):
+                self._tokens.setdefault(tok, set()).add(pos)
+        n = max(len(self.products), 1)
+        self._weight = {tok: math.log(1 + n / len(ps)) for tok, ps in self._tokens.items()}
+        self._grams: dict[str, set[str]] = {}
+        for tok in self._tokens:
+            for g in _trigrams(tok):
+                self._grams.setdefault(g, set()).add(tok)
+        self._fuzzy_cache: dict[str, Optional[tuple[str, float]]] = {}
+
+    # -------------------------
+    # Token normalization
+    # -------------------------
+    def _correct(self, word: str) -> Optional[tuple[str, float]]:
+        """Map a spoken word to a vocabulary token with a similarity in 0..1."""
+        word = SYNONYMS.get(word, word)
+        if word in self._tokens:
+            return word, 1.0
+        if word in self._fuzzy_cache:
+            return self._fuzzy_cache[word]
+        shared: dict[str, int] = {}
+        for g in _trigrams(word):
+            for tok in self._grams.get(g, ()):
+                shared[tok] = shared.get(tok, 0) + 1
+        best = None
+        for tok in sorted(shared, key=lambda t: -shared[t])[:FUZZY_SHORTLIST]:
+            ratio = SequenceMatcher(None, word, tok).ratio()
+            if ratio >= FUZZY_MIN_RATIO and (best is None or ratio > best[1]):
+                best = (tok, ratio)
+        if len(self._fuzzy_cache) < 10_000:
+            self._fuzzy_cache[word] = best
+        return best
+
+    # -------------------------
+    # Resolution
+    # -------------------------
+    def resolve(self, ref_text: str, candidates: Optional[list[Product]] = None) -> Optional[Resolution]:
+        """Resolve a reference, preferring ``candidates`` (e.g. the list just read out)."""
+        ref = (ref_text or "").lower().strip()
+        if not ref:
+            return None
+        order = self._candidate_order(candidates)
+
+        # direct id match ('mug-001', 'mug 001', 'MUG001')
+        pos = self._ids.get(_squash(ref))
+        if pos is not None:
+            return Resolution(self.products[pos], 1.0, "id")
+
+        words = re.findall(r"[a-z0-9]+(?:-[a-z0-9]+)*", ref)
+        ordinal = None
+        content: list[tuple[str, float]] = []
+        for word in words:
+            if word in ORDINALS:
+                ordinal = ORDINALS[word]
+                continue
+            if word in FILLER:
+                continue
+            for tok in tokenize(word):
+                if tok.isdigit() and tok not in self._tokens:
+                    # bare number: 'number 2', 'the 3 one'
+                    if ordinal is None:
+                        ordinal = int(tok) - 1
+                    continue
+                # unknown words still count against confidence
+                content.append(self._correct(tok) or (tok, 0.0))
+
+        if not content:
+            if ordinal is None:
+                return None
+            ranked = order if order is not None else range(len(self.products))
+            try:
+                pos = ranked[ordinal]
+            except IndexError:
+                return None
+            return Resolution(self.products[pos], 0.95 if order is not None else 0.6, "ordinal")
+
+        matched, coverage, unmatched = self._match_tokens(content, order)
+        pos = self._pick(matched, order, ordinal if ordinal is not None else 0)
+        if pos is None:
+            return None
+        return Resolution(self.products[pos], coverage, "tokens", unmatched)
+
+    def _candidate_order(self, candidates: Optional[list[Product]]) -> Optional[list[int]]:
+        if candidates is None:
+            return None
+        return [self._pos_by_id[p.id] for p in candidates if p.id in self._pos_by_id]
+
+    def _match_tokens(
+        self, content: list[tuple[str, float]], order: Optional[list[int]]
+    ) -> tuple[set[int], float, int]:
+        """Best-matching positions, their confidence and how many words they miss.
+
+        Confidence is the matched similarity over the words in the reference, with
+        each unmatched word counted twice: 'black mug' against a black hoodie scores
+        1/3, not 1/2, so a one-word overlap stays below a real match.
+        """
+        known = [(tok, sim) for tok, sim in content if sim > 0]
+        if not known:
+            return set(), 0.0, len(content)
+        allowed = set(order) if order is not None else None
+
+        # every known word matches: intersect postings, smallest first
+        postings = sorted((self._tokens[tok] for tok, _ in known), key=len)
+        full = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+        if allowed is not None:
+            full = full & allowed
+        if full:
+            unmatched = len(content) - len(known)
+            return full, sum(sim for _, sim in known) / (len(content) + unmatched), unmatched
+
+        # otherwise the products covering the largest (idf-weighted) share of the words
+        scores: dict[int, float] = {}
+        for tok, sim in known:
+            w = sim * self._weight[tok]
+            for pos in self._tokens[tok]:
+                if allowed is None or pos in allowed:
+                    scores[pos] = scores.get(pos, 0.0) + w
+        if not scores:
+            return set(), 0.0, len(content)
+        best = max(scores.values())
+        top = {pos for pos, s in scores.items() if s == best}
+        some = next(iter(top))
+        matched = [sim for tok, sim in known if some in self._tokens[tok]]
+        unmatched = len(content) - len(matched)
+        return top, sum(matched) / (len(content) + unmatched), unmatched
+
+    @staticmethod
+    def _pick(positions: set[int], order: Optional[list[int]], idx: int) -> Optional[int]:
+        """The idx-th matching position in candidate order (catalog order if none)."""
+        if not -len(positions) <= idx < len(positions):
+            return None
+        if order is not None:
+            ranked = [pos for pos in order if pos in positions]
+            return ranked[idx] if -len(ranked) <= idx < len(ranked) else None
+        if idx == 0:
+            return min(positions)
+        if idx == -1:
+            return max(positions)
+        if idx > 0:
+            return heapq.nsmallest(idx + 1, positions)[-1]
+        return heapq.nlargest(-idx, positions)[-1]
+
+
+def _squash(text: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", text.lower())
@@ -0,0 +1,289 @@
+# Product Search - tokenized inverted index with BM25 ranking
+#
+# Indexes product name (weighted), description, category and color. Query terms
+# match exactly and, for terms of three or more letters, by prefix ("hood" ->
+# "hoodie"), with prefix hits discounted. Products can be added, updated or
+# removed without rebuilding the index.
+#
+# Top-k queries use the threshold algorithm: each term keeps its postings sorted
+# by BM25 impact, the lists are walked in parallel, and the walk stops as soon as
+# no unseen product can beat the current k-th score. Impacts use a snapshot of
+# the average document length that is refreshed once it drifts by AVGDL_DRIFT,
+# so an update only re-sorts the impact lists of the terms it touched.
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Iterable
+from typing import Optional
+
+from models import Product
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    {"a", "an", "and", "any", "for", "in", "me", "of", "show", "some", "the", "with"}
+)
+
+NAME_WEIGHT = 2  # name tokens count this many times toward term frequency
+PREFIX_MIN_LEN = 3
+PREFIX_DISCOUNT = 0.5
+MAX_PREFIX_EXPANSIONS = 16
+AVGDL_DRIFT = 0.05
+
+
+def _stem(tok: str) -> str:
+    # light plural folding so 'hoodies'/'mugs' match 'hoodie'/'mug'
+    if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+        return tok[:-1]
+    return tok
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens; hyphenated words also yield the joined form
+    ('t-shirt' -> 't', 'shirt', 'tshirt')."""
+    tokens = []
+    for word in _TOKEN_RE.findall((text or "").lower()):
+        if "-" in word:
+            parts = word.split("-")
+            tokens.extend(parts)
+            tokens.append("".join(parts))
+        else:
+            tokens.append(word)
+    return [_stem(t) for t in tokens if t not in STOPWORDS]
+
+
+def _product_terms(p: Product) -> Counter:
+    terms = Counter()
+    for tok in tokenize(p.name):
+        terms[tok] += NAME_WEIGHT
+    terms.update(tokenize(" ".join((p.description, p.category, p.color or ""))))
+    return terms
+
+
+class SearchIndex:
+    def __init__(self, products: Iterable[Product] = (), k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[str, int]] = {}  # term -> {product_id: tf}
+        self._doc_terms: dict[str, Counter] = {}
+        self._doc_len: dict[str, int] = {}
+        self._total_len = 0
+        self._vocab: list[str] = []  # sorted, for prefix lookups
+        self._avgdl = 0.0  # snapshot used for impacts
+        self._impacts: dict[str, list[tuple[float, str]]] = {}  # term -> sorted desc
+        for p in products:
+            self.add(p)
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    # -------------------------
+    # Incremental maintenance
+    # -------------------------
+    def add(self, product: Product) -> None:
+        """Index a product, replacing any previous version with the same id."""
+        pid = product.id
+        if pid in self._doc_terms:
+            self.remove(pid)
+        terms = _product_terms(product)
+        for term, tf in terms.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                insort(self._vocab, term)
+            posting[pid] = tf
+            self._impacts.pop(term, None)
+        length = sum(terms.values())
+        self._doc_terms[pid] = terms
+        self._doc_len[pid] = length
+        self._total_len += length
+
+    update = add
+
+    def remove(self, product_id: str) -> None:
+        terms = self._doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings[term]
+            del posting[product_id]
+            self._impacts.pop(term, None)
+            if not posting:
+                del self._postings[term]
+                del self._vocab[bisect_left(self._vocab, term)]
+        self._total_len -= self._doc_len.pop(product_id)
+
+    # -------------------------
+    # Scoring
+    # -------------------------
+    def _refresh_avgdl(self) -> None:
+        avgdl = self._total_len / len(self._doc_len)
+        if not self._avgdl or abs(avgdl - self._avgdl) > AVGDL_DRIFT * self._avgdl:
+            self._avgdl = avgdl
+            self._impacts.clear()
+
+    def _impact(self, tf: int, pid: str) -> float:
+        k1 = self.k1
+        return tf * (k1 + 1) / (tf + k1 * (1 - self.b + self.b * self._doc_len[pid] / self._avgdl))
+
+    def _impact_list(self, term: str) -> list[tuple[float, str]]:
+        cached = self._impacts.get(term)
+        if cached is None:
+            impact = self._impact
+            cached = sorted(
+                ((impact(tf, pid), pid) for pid, tf in self._postings[term].items()),
+                key=lambda ip: -ip[0],
+            )
+            self._impacts[term] = cached
+        return cached
+
+    def _expand(self, term: str) -> list[tuple[str, float]]:
+        """Index terms matching ``term`` with their weight (exact 1.0, prefix discounted)."""
+        matches = []
+        if term in self._postings:
+            matches.append((term, 1.0))
+        if len(term) >= PREFIX_MIN_LEN:
+            i = bisect_left(self._vocab, term)
+            while i < len(self._vocab) and len(matches) <= MAX_PREFIX_EXPANSIONS:
+                cand = self._vocab[i]
+                if not cand.startswith(term):
+                    break
+                if cand != term:
+                    matches.append((cand, PREFIX_DISCOUNT))
+                i += 1
+        return matches
+
+    def _score(self, pid: str, terms: list[tuple[str, float]]) -> float:
+        score = 0.0
+        for term, weight in terms:
+            tf = self._postings[term].get(pid)
+            if tf:
+                score += weight * self._impact(tf, pid)
+        return score
+
+    def search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        allowed: Optional[set[str]] = None,
+    ) -> list[tuple[str, float]]:
+        """Return (product_id, score) pairs, best first.
+
+        Products matching every query word rank ahead of partial matches.
+
+        k:       keep only the top k results.
+        allowed: restrict results to these product ids (e.g. from attribute filters).
+        """
+        n = len(self._doc_len)
+        if not n:
+            return []
+        self._refresh_avgdl()
+
+        # index terms each query word expands to, and (term, idf * match weight)
+        groups: list[list[str]] = []
+        weighted: dict[str, float] = {}
+        for qterm in dict.fromkeys(tokenize(query)):
+            expanded = self._expand(qterm)
+            if not expanded:
+                continue
+            groups.append([term for term, _ in expanded])
+            for term, weight in expanded:
+                df = len(self._postings[term])
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                weighted[term] = weighted.get(term, 0.0) + weight * idf
+        if not weighted:
+            return []
+        terms = list(weighted.items())
+
+        if len(groups) < 2:
+            return self._rank(terms, k, allowed)
+        # conjunctive first: set intersections run in C and usually leave few products
+        groups.sort(key=lambda g: sum(len(self._postings[t]) for t in g))
+        must: set[str] = set().union(*(self._postings[t] for t in groups[0]))
+        for group in groups[1:]:
+            if len(group) == 1:
+                posting = self._postings[group[0]]
+                must = {pid for pid in must if pid in posting}
+            else:
+                postings = [self._postings[t] for t in group]
+                must = {pid for pid in must if any(pid in p for p in postings)}
+            if not must:
+                break
+        if allowed is not None:
+            must &= allowed
+        head = self._rank(terms, k, must) if must else []
+        if k is not None and len(head) >= k:
+            return head
+        tail = self._rank(terms, None if k is None else k - len(head), allowed, exclude=must)
+        return head + tail
+
+    def _rank(
+        self,
+        terms: list[tuple[str, float]],
+        k: Optional[int],
+        allowed: Optional[set[str]],
+        exclude: Optional[set[str]] = None,
+    ) -> list[tuple[str, float]]:
+        exclude = exclude or set()
+        total_postings = sum(len(self._postings[t]) for t, _ in terms)
+        if allowed is not None and len(allowed) * 16 < total_postings:
+            # small candidate set: score it directly
+            scored = (
+                (pid, self._score(pid, terms))
+                for pid in allowed
+                if pid in self._doc_len and pid not in exclude
+            )
+            results = [(pid, s) for pid, s in scored if s > 0]
+        elif k is None:
+            scores: dict[str, float] = {}
+            for term, w in terms:
+                for pid, tf in self._postings[term].items():
+                    if (allowed is None or pid in allowed) and pid not in exclude:
+                        scores[pid] = scores.get(pid, 0.0) + w * self._impact(tf, pid)
+            results = list(scores.items())
+        else:
+            return self._top_k(terms, k, allowed, exclude)
+        if k is not None:
+            return heapq.nlargest(k, results, key=lambda kv: kv[1])
+        results.sort(key=lambda kv: -kv[1])
+        return results
+
+    def _top_k(
+        self,
+        terms: list[tuple[str, float]],
+        k: int,
+        allowed: Optional[set[str]],
+        exclude: set[str],
+    ) -> list[tuple[str, float]]:
+        """Threshold algorithm over the per-term impact lists."""
+        lists = [(self._impact_list(t), w) for t, w in terms]
+        cursors = [0] * len(lists)
+        seen: set[str] = set(exclude)
+        heap: list[tuple[float, int, str]] = []  # min-heap of (score, -arrival, pid)
+        arrival = 0
+        while True:
+            threshold = 0.0
+            advanced = False
+            for i, (impacts, w) in enumerate(lists):
+                pos = cursors[i]
+                if pos >= len(impacts):
+                    continue
+                impact, pid = impacts[pos]
+                cursors[i] = pos + 1
+                advanced = True
+                threshold += w * impact
+                if pid in seen or (allowed is not None and pid not in allowed):
+                    continue
+                seen.add(pid)
+                score = self._score(pid, terms)
+                arrival += 1
+                entry = (score, -arrival, pid)
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+            if not advanced or (len(heap) == k and heap[0][0] >= threshold):
+                break
+        return [(pid, score) for score, _, pid in sorted(heap, reverse=True)]
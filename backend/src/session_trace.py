@@ -0,0 +1,160 @@
+# Session Trace - bounded in-memory action history, full trace on disk
+#
+# Every cart and order action a session takes is recorded for debugging and
+# support ("what did this shopper do before checkout failed?"). A session can
+# last for hours at a kiosk, so memory holds only the last HISTORY_SIZE actions:
+# compact slotted records with a monotonic offset from session start and an
+# Action code. Older records fall out of the ring into a small encoded buffer,
+# which is appended to the session's trace file whenever it passes SPILL_BYTES.
+# At session end the rest is written (close()); all file writes run on one
+# background thread, in order, so tools never wait on disk.
+#
+# A trace file is JSON lines: a header (session, room, wall-clock start, action
+# names), then one [seconds, action, subject, quantity] array per action.
+# read_trace() turns it back into events with wall-clock times:
+#
+#     python session_trace.py /tmp/stylehub-traces/trace-1a2b3c4d.jsonl
+import asyncio
+import enum
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Union
+
+TRACE_DIR = Path(os.getenv("TRACE_DIR", Path(tempfile.gettempdir()) / "stylehub-traces"))
+SESSION_TRACES = os.getenv("SESSION_TRACES", "1") == "1"
+# Actions kept in memory per session
+HISTORY_SIZE = int(os.getenv("SESSION_HISTORY_SIZE", "128"))
+# Encoded overflow held per session before it is appended to the trace file
+SPILL_BYTES = 16 * 1024
+
+TRACE_FORMAT = 1
+
+
+class Action(enum.IntEnum):
+    ADD_TO_CART = 1
+    REMOVE_FROM_CART = 2
+    UPDATE_CART_QUANTITY = 3
+    CLEAR_CART = 4
+    PLACE_ORDER = 5
+
+
+@dataclass
+class Event:
+    __slots__ = ("action", "quantity", "subject", "t")
+    t: float  # seconds since the session started (monotonic clock)
+    action: Union[Action, int]  # int if the trace was written by a newer version
+    subject: Optional[str]  # product id or order id
+    quantity: Optional[int]
+
+    def encode(self) -> bytes:
+        quantity = "null" if self.quantity is None else int(self.quantity)
+        return f"[{self.t:.3f},{int(self.action)},{json.dumps(self.subject)},{quantity}]\n".encode()
+
+
+# One writer thread per process: a session's writes run in the order submitted
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-trace")
+
+
+def _append(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+class SessionHistory:
+    """The last ``size`` actions of a session; older ones are spilled to its trace file."""
+
+    def __init__(self, session_id: str, room: Optional[str] = None, size: int = HISTORY_SIZE,
+                 directory: Optional[Path] = TRACE_DIR if SESSION_TRACES else None):
+        self.session_id = session_id
+        self.room = room
+        self.path = directory / f"trace-{session_id}.jsonl" if directory is not None else None
+        self.recorded = 0  # actions ever recorded, including spilled ones
+        self._events: deque[Event] = deque(maxlen=size)
+        self._started = time.monotonic()
+        self._started_wall = datetime.now(timezone.utc)
+        self._spill = bytearray()
+        self._header_written = False
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self._events)
+
+    def record(self, action: Action, subject: Optional[str] = None, quantity: Optional[int] = None) -> None:
+        if len(self._events) == self._events.maxlen and self.path is not None:
+            self._spill += self._events[0].encode()
+            if len(self._spill) >= SPILL_BYTES:
+                self._submit(bytes(self._spill))
+                self._spill.clear()
+        self._events.append(Event(time.monotonic() - self._started, action, subject, quantity))
+        self.recorded += 1
+
+    def _header(self) -> bytes:
+        return json.dumps({
+            "trace_format": TRACE_FORMAT,
+            "session_id": self.session_id,
+            "room": self.room,
+            "started_at": self._started_wall.isoformat(),
+            "actions": {int(a): a.name.lower() for a in Action},
+        }).encode() + b"\n"
+
+    def _submit(self, data: bytes) -> Future:
+        if not self._header_written:
+            data = self._header() + data
+            self._header_written = True
+        return _writer.submit(_append, self.path, data)
+
+    async def close(self) -> Optional[Path]:
+        """Write everything not yet on disk; returns the trace file (None if disabled or empty)."""
+        if self.path is None or not self.recorded:
+            return None
+        data = bytes(self._spill) + b"".join(e.encode() for e in self._events)
+        self._spill.clear()
+        await asyncio.wrap_future(self._submit(data))
+        return self.path
+
+
+# -------------------------
+# Offline reader
+# -------------------------
+def read_trace(path: Union[str, Path]) -> tuple[dict, list[Event]]:
+    """The header and every event of a trace file, oldest first."""
+    with open(path, "rb") as f:
+        header = json.loads(f.readline())
+        events = []
+        for line in f:
+            if not line.strip():
+                continue
+            t, code, subject, quantity = json.loads(line)
+            try:
+                action = Action(code)
+            except ValueError:
+                action = code
+            events.append(Event(t, action, subject, quantity))
+    return header, events
+
+
+def format_trace(header: dict, events: list[Event]) -> Iterator[str]:
+    started = datetime.fromisoformat(header["started_at"])
+    names = {int(code): name for code, name in header.get("actions", {}).items()}
+    yield f"session {header['session_id']} room {header.get('room') or '-'} started {header['started_at']}"
+    for e in events:
+        when = (started + timedelta(seconds=e.t)).isoformat(timespec="milliseconds")
+        detail = " ".join(v for v in (e.subject, None if e.quantity is None else f"x{e.quantity}") if v)
+        yield f"{when}  +{e.t:9.3f}s  {names.get(int(e.action), str(int(e.action))):<22}{detail}"
+
+
+if __name__ == "__main__":
+    for trace in sys.argv[1:]:
+        print("\n".join(format_trace(*read_trace(trace))))
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    pytest.importorskip("fastapi")
+    os.environ.setdefault("ORDERS_JOURNAL", str(tmp_path_factory.mktemp("orders") / "orders.jsonl"))
+    from fastapi.testclient import TestClient
+
+    import api
+
+    with TestClient(api.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize(
+    "line_item, status",
+    [
+        ({"product_id": "mug-001", "quantity": -3}, 422),
+        ({"product_id": "mug-001", "quantity": 0}, 422),
+        ({"product_id": "mug-001", "size": "M"}, 400),
+        ({"product_id": "hoodie-001", "size": "XXL"}, 400),
+    ],
+)
+def test_invalid_line_items_are_rejected(client, line_item, status):
+    before = client.get("/acp/stats").json()["total_revenue"]
+    assert client.post("/acp/orders", json={"line_items": [line_item]}).status_code == status
+    assert client.get("/acp/stats").json()["total_revenue"] == before
+
+
+def test_size_is_stored_as_the_catalog_spells_it(client):
+    response = client.post("/acp/orders", json={"line_items": [{"product_id": "hoodie-001", "size": "m"}]})
+    assert response.status_code == 201
+    assert response.json()["line_items"][0]["size"] == "M"
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+import catalog
+
+
+@pytest.fixture(scope="module")
+def resolver():
+    return catalog.get_index().resolver
+
+
+@pytest.fixture(scope="module")
+def hoodies():
+    return [p for p in catalog.get_index().products if p.category == "hoodie"]
+
+
+def test_one_word_overlap_scores_below_a_full_match(resolver, hoodies):
+    partial = resolver.resolve("black mug", hoodies)
+    assert partial.product.id == "hoodie-001"
+    assert partial.unmatched == 1
+    assert partial.confidence < 0.5
+
+    full = resolver.resolve("black mug")
+    assert full.product.id == "mug-002"
+    assert full.unmatched == 0
+    assert full.confidence == 1.0
+
+
+@pytest.fixture(scope="module")
+def agent(tmp_path_factory):
+    pytest.importorskip("livekit.agents")
+    os.environ.setdefault("ORDERS_JOURNAL", str(tmp_path_factory.mktemp("orders") / "orders.jsonl"))
+    import agent
+
+    return agent
+
+
+@pytest.mark.parametrize(
+    "ref, product_id",
+    [
+        ("black mug", "mug-002"),
+        ("the black tee", "tshirt-002"),
+        ("the black one", "hoodie-001"),
+        ("the second one", "hoodie-002"),
+        ("navy hoody", "hoodie-002"),
+    ],
+)
+def test_session_ref_after_a_hoodie_listing(agent, ref, product_id):
+    userdata = agent.Userdata()
+    shown = agent.list_products({"category": "hoodie"}, limit=agent.CATALOG_LISTING_SIZE)
+    userdata.recent_results.append(agent.ShownResults(tuple(p.id for p in shown)))
+    assert agent.resolve_session_ref(userdata, ref).id == product_id
@@ -39,12 +39,29 @@ export function OrderHistory() {
   useEffect(() => {
     fetchOrders();
     fetchStats();
+
+    // new orders and stats are pushed as they are placed, no polling
+    const events = new EventSource('http://localhost:8000/acp/orders/events');
+    events.addEventListener('order', (e) => {
+      const order: Order = JSON.parse((e as MessageEvent).data);
+      setOrders((prev) => [order, ...prev.filter((o) => o.id !== order.id)]);
+    });
+    events.addEventListener('stats', (e) => {
+      setStats(JSON.parse((e as MessageEvent).data));
+    });
+    // we fell behind and were dropped: start over from the REST endpoints
+    events.addEventListener('reset', () => {
+      fetchOrders();
+      fetchStats();
+    });
+    return () => events.close();
   }, []);
 
   const fetchOrders = async () => {
     try {
       // Try to fetch from API, fallback to reading orders.json
-      const response = await fetch('http://localhost:8000/acp/orders');
+      // newest first, one page; follow data.next_cursor for older orders
+      const response = await fetch('http://localhost:8000/acp/orders?limit=50');
       if (response.ok) {
         const data = await response.json();
         setOrders(data.orders || []);
@@ -143,7 +160,7 @@ export function OrderHistory() {
           </div>
         ) : (
           <div className="space-y-4">
-            {orders.slice().reverse().map((order) => (
+            {orders.map((order) => (
               <div
                 key={order.id}
                 className="group bg-white border border-slate-200 rounded-2xl p-5 hover:border-blue-400 transition-all cursor-pointer hover:shadow-lg hover:shadow-blue-500/10"
@@ -34,7 +34,21 @@ export function ProductGrid({ onProductBuy }: ProductGridProps) {
 
   const fetchProducts = async () => {
     try {
-      // For now, use static data (you can add API endpoint later)
+      // served precompressed with an ETag, so revisits revalidate with a 304
+      const response = await fetch('http://localhost:8000/acp/catalog');
+      if (response.ok) {
+        const data = await response.json();
+        setProducts(data.products);
+        setFilteredProducts(data.products);
+        setLoading(false);
+        return;
+      }
+    } catch (error) {
+      console.log('Catalog API not available, using static data');
+    }
+
+    try {
+      // Fallback: static copy of the catalog
       const staticProducts: Product[] = [
         {
           id: "mug-001",